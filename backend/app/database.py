@@ -1,17 +1,37 @@
 # backend/app/database.py
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Optional
+from bson import ObjectId
+from typing import List, Optional, Tuple
 from datetime import datetime
+import base64
+from .metrics import span
 
 class Database:
     client: Optional[AsyncIOMotorClient] = None
 
+    # Fields needed by history list views; skips the bulky individual_analyses
+    SUMMARY_PROJECTION = {
+        "wallet_address": 1,
+        "timestamp": 1,
+        "total_odds": 1,
+        "bets": 1,
+        "overall_score": 1,
+        "should_show_solana": 1,
+    }
+
     @classmethod
     async def connect_db(cls):
         # Connect to local MongoDB instance
         cls.client = AsyncIOMotorClient("mongodb://localhost:27017")
         cls.db = cls.client.parlay_pulse  # Create/use a database named parlay_pulse
 
+    @classmethod
+    async def ensure_indexes(cls):
+        # Serves "latest analyses for a wallet" and keyset pagination without a scan or sort
+        await cls.db.analyses.create_index(
+            [("wallet_address", 1), ("timestamp", -1), ("_id", -1)]
+        )
+
     @classmethod
     async def close_db(cls):
         if cls.client is not None:
@@ -21,9 +41,57 @@ class Database:
     async def save_analysis(cls, data: dict):
         # Add timestamp to the analysis
         data["timestamp"] = datetime.utcnow()
-        return await cls.db.analyses.insert_one(data)
+        with span("db_write"):
+            return await cls.db.analyses.insert_one(data)
+
+    @classmethod
+    async def save_analyses(cls, data: List[dict]):
+        # Bulk variant of save_analysis for batch requests
+        timestamp = datetime.utcnow()
+        for doc in data:
+            doc.setdefault("timestamp", timestamp)
+        with span("db_write"):
+            return await cls.db.analyses.insert_many(data, ordered=False)
 
     @classmethod
     async def get_user_analyses(cls, wallet_address: str):
-        cursor = cls.db.analyses.find({"wallet_address": wallet_address})
-        return await cursor.to_list(length=20)  # Get last 20 analyses
\ No newline at end of file
+        docs, _ = await cls.get_analysis_page(wallet_address, limit=20, summary=False)
+        return docs  # Get last 20 analyses
+
+    @classmethod
+    async def get_analysis_page(
+        cls, wallet_address: str, limit: int = 20, cursor: Optional[str] = None, summary: bool = True
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Newest-first analyses for a wallet, plus a cursor for the next page (None on the last)."""
+        query = {"wallet_address": wallet_address}
+        if cursor:
+            timestamp, last_id = cls._decode_cursor(cursor)
+            query["$or"] = [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "_id": {"$lt": last_id}},
+            ]
+
+        projection = cls.SUMMARY_PROJECTION if summary else None
+        docs = await cls.db.analyses.find(query, projection).sort(
+            [("timestamp", -1), ("_id", -1)]
+        ).limit(limit + 1).to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = cls._encode_cursor(docs[-1]["timestamp"], docs[-1]["_id"])
+        return docs, next_cursor
+
+    @staticmethod
+    def _encode_cursor(timestamp: datetime, last_id: ObjectId) -> str:
+        raw = f"{timestamp.isoformat()}|{last_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+        """Raises ValueError for a malformed cursor."""
+        try:
+            timestamp, last_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(timestamp), ObjectId(last_id)
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
\ No newline at end of file
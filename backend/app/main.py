@@ -1,8 +1,28 @@
 # backend/app/main.py
-from fastapi import FastAPI
+import asyncio
+import logging
+import os
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from .routers import bets
 from .database import Database
+from .services.http_client import HTTPClient
+from .services.ocr_pool import OCRPool
+from .services.slip_cache import SlipCache
+from .services.ingestion import GameIngestor
+from .services.analysis_writer import AnalysisWriter
+from .services.rollups import Rollups
+from . import metrics
+
+# DEBUG adds per-span timings and OCR/parser output; INFO and above keep the hot path quiet
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s %(message)s"
+)
+# httpx logs every upstream request at INFO
+logging.getLogger("httpx").setLevel(os.getenv("HTTPX_LOG_LEVEL", "WARNING").upper())
 
 app = FastAPI()
 
@@ -18,13 +38,94 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_db_client():
     await Database.connect_db()
+    await Database.ensure_indexes()
+    await SlipCache.ensure_indexes()
+    await GameIngestor.ensure_indexes()
+    await HTTPClient.connect()
+    await OCRPool.start()
+    Rollups.configure(bets.analyzer.nfl_client)
+    await AnalysisWriter.start()
+    # Refresh the team index in the background. A snapshot from a previous run, if any, serves
+    # requests meanwhile; on a fresh deploy the first lookups fetch /teams inline
+    asyncio.ensure_future(bets.analyzer.nfl_client.refresh_teams())
+    # Score from whatever is already stored, then keep the store and table in sync
+    asyncio.ensure_future(bets.analyzer.refresh_from_store())
+    GameIngestor.start(bets.analyzer.nfl_client, bets.analyzer.refresh_from_store)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await GameIngestor.stop()
+    # Drain buffered analyses before the database connection goes away
+    await AnalysisWriter.stop()
     await Database.close_db()
+    await HTTPClient.close()
+    await OCRPool.close()
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template, not raw path, so wallet addresses don't explode cardinality.
+    # Streaming responses are timed to their headers; per-stage spans cover the rest.
+    route = request.scope.get("route")
+    metrics.HTTP_SECONDS.observe(
+        time.perf_counter() - started,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=response.status_code
+    )
+    return response
 
 app.include_router(bets.router, prefix="/api/v1/bets", tags=["bets"])
 
 @app.get("/")
 async def read_root():
-    return {"message": "Parlay Pulse API is running!"}
\ No newline at end of file
+    return {"message": "Parlay Pulse API is running!"}
+
+@app.get("/stats/cache")
+async def cache_stats():
+    # Hit/miss counters show how much upstream traffic the stats cache avoids
+    return bets.analyzer.nfl_client.cache.get_stats()
+
+@app.get("/stats/ocr")
+async def ocr_stats():
+    return OCRPool.get_stats()
+
+@app.get("/stats/slip-cache")
+async def slip_cache_stats():
+    return SlipCache.stats
+
+@app.get("/stats/ingestion")
+async def ingestion_stats():
+    return GameIngestor.stats
+
+@app.get("/stats/matchups")
+async def matchup_stats():
+    return bets.analyzer.matchup_table.get_stats()
+
+@app.get("/stats/writer")
+async def writer_stats():
+    return AnalysisWriter.get_stats()
+
+@app.get("/stats/upstream")
+async def upstream_stats():
+    # Rate limiter, retry budget and circuit breaker state for the stats API
+    return bets.analyzer.nfl_client.upstream.get_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Latency histograms plus every /stats counter, in Prometheus text format."""
+    nfl_client = bets.analyzer.nfl_client
+    cache = nfl_client.cache.get_stats()
+    gauges = metrics.stat_gauges("cache", {k: v for k, v in cache.items() if k != "namespaces"})
+    for namespace, counters in cache.get("namespaces", {}).items():
+        gauges += metrics.stat_gauges("cache", counters, {"namespace": namespace})
+    gauges += metrics.stat_gauges("ocr", OCRPool.get_stats())
+    gauges += metrics.stat_gauges("slip_cache", SlipCache.stats)
+    gauges += metrics.stat_gauges("ingestion", GameIngestor.stats)
+    gauges += metrics.stat_gauges("matchups", bets.analyzer.matchup_table.get_stats())
+    gauges += metrics.stat_gauges("writer", AnalysisWriter.get_stats())
+    gauges += metrics.stat_gauges("upstream", nfl_client.upstream.get_stats())
+    return PlainTextResponse(
+        metrics.render(gauges), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
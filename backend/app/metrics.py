@@ -0,0 +1,167 @@
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers cached lookups (~1ms) through OCR and slow upstream calls (~10s)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, one series per label combination."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> (per-bucket counts, sum, count)
+        self._series: Dict[LabelValues, List] = {}
+        # Spans may also run in worker threads (asyncio.to_thread)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, inf)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter, one series per label combination."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+SPAN_SECONDS = Histogram(
+    "parlay_pulse_span_seconds",
+    "Time spent in each stage of the request pipeline.",
+    ("span",)
+)
+SPAN_ERRORS = Counter(
+    "parlay_pulse_span_errors_total",
+    "Pipeline stages that ended in an exception.",
+    ("span",)
+)
+UPSTREAM_SECONDS = Histogram(
+    "parlay_pulse_upstream_request_seconds",
+    "Latency of each stats API attempt, including retries.",
+    ("endpoint", "outcome")
+)
+HTTP_SECONDS = Histogram(
+    "parlay_pulse_http_request_seconds",
+    "Time to response headers for each API route.",
+    ("method", "route", "status")
+)
+
+HISTOGRAMS = [SPAN_SECONDS, UPSTREAM_SECONDS, HTTP_SECONDS]
+COUNTERS = [SPAN_ERRORS]
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a pipeline stage into SPAN_SECONDS; works around awaits as well as plain code."""
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        SPAN_ERRORS.inc(span=name)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        SPAN_SECONDS.observe(elapsed, span=name)
+        logger.debug("span=%s duration_ms=%.2f error=%s", name, elapsed * 1000, failed)
+
+
+def stat_gauges(component: str, stats: Dict, labels: Optional[Dict[str, str]] = None) -> List[Tuple[str, Dict, float]]:
+    """Numeric entries of a get_stats() dict as (metric name, labels, value); strings and None are skipped."""
+    gauges = []
+    for key, value in stats.items():
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            gauges.append((f"parlay_pulse_{component}_{key}", labels or {}, float(value)))
+    return gauges
+
+
+def render(gauges: Sequence[Tuple[str, Dict, float]] = ()) -> str:
+    """Prometheus text exposition of every histogram and counter plus the given gauges."""
+    lines: List[str] = []
+    for metric in HISTOGRAMS + COUNTERS:
+        lines.extend(metric.render())
+
+    by_name: Dict[str, List[Tuple[Dict, float]]] = {}
+    for name, labels, value in gauges:
+        by_name.setdefault(name, []).append((labels, value))
+    for name, series in by_name.items():
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in series:
+            label_text = _format_labels(list(labels), list(labels.values()))
+            lines.append(f"{name}{label_text} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
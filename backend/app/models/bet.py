@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Optional
+from datetime import datetime
 
 class Bet(BaseModel):
     team: str
@@ -20,8 +21,48 @@ class BetAnalysis(BaseModel):
     confidence_score: int
     factors: List[str]
     recommendation: str
+    degraded: bool = False  # Scored from partial or fallback data because the stats API failed
+    scored: bool = True  # False for markets the analyzer does not score (spreads, totals, props)
 
 class ParlayAnalysisResponse(BaseModel):
     overall_score: int
     individual_analyses: List[BetAnalysis]
-    should_show_solana: bool
\ No newline at end of file
+    should_show_solana: bool
+    degraded: bool = False  # True if any leg is degraded
+    parse_warnings: List[str] = []  # What the slip parser could not read, for image uploads
+
+class BatchAnalysisRequest(BaseModel):
+    parlays: List[ParlayAnalysisRequest]
+
+class BatchAnalysisResponse(BaseModel):
+    results: List[ParlayAnalysisResponse]
+
+class AnalysisSummary(BaseModel):
+    id: str
+    timestamp: datetime
+    total_odds: int
+    bets: List[Bet]
+    overall_score: int
+    should_show_solana: bool
+
+class AnalysisHistoryResponse(BaseModel):
+    analyses: List[AnalysisSummary]
+    next_cursor: Optional[str] = None
+
+class WalletStats(BaseModel):
+    wallet_address: str
+    analyses: int
+    legs: int
+    average_overall_score: float
+    strong_leg_rate: float
+    confident_parlay_rate: float
+    recommendations: Dict[str, int]
+    favorite_teams: List[str]
+    first_analysis_at: Optional[datetime] = None
+    last_analysis_at: Optional[datetime] = None
+
+class TeamStats(BaseModel):
+    team: str
+    picks: int
+    average_confidence: float
+    recommendations: Dict[str, int]
\ No newline at end of file
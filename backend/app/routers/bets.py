@@ -1,42 +1,123 @@
-from fastapi import APIRouter, HTTPException, UploadFile, Form, File
-from typing import List
+from fastapi import APIRouter, HTTPException, UploadFile, Form, File, Response, Query
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import asyncio
+import json
+import logging
+import os
 from ..models.bet import (
     ParlayAnalysisRequest, 
     ParlayAnalysisResponse, 
     BetAnalysis,
-    ParlayBet  # Add this import
+    ParlayBet,  # Add this import
+    BatchAnalysisRequest,
+    BatchAnalysisResponse,
+    AnalysisSummary,
+    AnalysisHistoryResponse,
+    WalletStats,
+    TeamStats
 )
 from ..services.analyzer import BetAnalyzer
 from ..services.nfl_client import NFLClient
 from ..services.image_processor import ImageProcessor  # Add this
+from ..services.ocr_pool import OCRPoolSaturated
+from ..services.slip_cache import SlipCache
+from ..services.analysis_writer import AnalysisWriter
+from ..services.rollups import Rollups
 from ..database import Database
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 analyzer = BetAnalyzer()
 
+BATCH_MAX_PARLAYS = int(os.getenv("BATCH_MAX_PARLAYS", "200"))
+LEG_TIMEOUT = float(os.getenv("LEG_TIMEOUT_SECONDS", "5"))
+
 @router.post("/analyze-image")
 async def analyze_bet_image(
+    response: Response,
     image: UploadFile = File(...),
-    wallet_address: str = Form(...)
+    wallet_address: str = Form(...),
+    sportsbook: str = Form("default")
 ):
     try:
-        print(f"Received image: {image.filename}, type: {image.content_type}")
-        contents = await image.read()
-        parsed_parlay = await ImageProcessor.process_bet_image(contents)
+        parsed_parlay, cache_status = await _parse_slip_image(image, sportsbook)
+        response.headers["X-Slip-Cache"] = cache_status
         
         # Convert to our request format
-        request = ParlayAnalysisRequest(
-            parlay=ParlayBet(**parsed_parlay),
-            wallet_address=wallet_address
-        )
-        
-        return await analyze_parlay(request)
+        request = _slip_request(parsed_parlay, wallet_address)
         
+        result = await analyze_parlay(request)
+        result.parse_warnings = parsed_parlay.get("warnings", [])
+        return result
+
+    except OCRPoolSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "2"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out reading bet slip image")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error processing image: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/analyze-image/stream")
+async def analyze_bet_image_stream(
+    image: UploadFile = File(...),
+    wallet_address: str = Form(...),
+    sportsbook: str = Form("default")
+):
+    # OCR finishes before the stream opens so saturation and timeouts keep their status codes
+    try:
+        parsed_parlay, cache_status = await _parse_slip_image(image, sportsbook)
+        request = _slip_request(parsed_parlay, wallet_address)
+    except OCRPoolSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "2"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out reading bet slip image")
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error processing image: {str(e)}")
+        logger.exception("Error processing image: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+    return _event_stream(
+        _stream_analysis(request, parsed=True, warnings=parsed_parlay.get("warnings", [])),
+        {"X-Slip-Cache": cache_status}
+    )
+
+async def _parse_slip_image(image: UploadFile, sportsbook: str) -> Tuple[Dict, str]:
+    """OCR and parse an uploaded slip, reusing the slip cache; returns (parlay, cache status)."""
+    logger.debug("Received image: %s, type: %s", image.filename, image.content_type)
+    contents = await image.read()
+    sportsbook = sportsbook.lower()
+
+    # Re-uploads of the same slip reuse the earlier parse instead of running OCR again
+    fingerprint = SlipCache.fingerprint(contents, sportsbook)
+    parsed_parlay, cache_status = await SlipCache.lookup(fingerprint, contents)
+    if parsed_parlay is None:
+        parsed_parlay = await ImageProcessor.process_bet_image(contents, sportsbook, _is_team)
+        await SlipCache.store(fingerprint, parsed_parlay)
+    return parsed_parlay, cache_status
+
+def _is_team(name: str) -> bool:
+    # Lets the slip parser trust "Chiefs at Bills" matchups only between real teams
+    return analyzer.nfl_client.team_index.lookup(name) is not None
+
+def _slip_request(parsed_parlay: Dict, wallet_address: str) -> ParlayAnalysisRequest:
+    """Build the analysis request from a parsed slip; 422 with the partial parse if it is unusable."""
+    if parsed_parlay.get("total_odds") is None or not parsed_parlay.get("individual_bets"):
+        # A client error rather than a 500, so clients fix the upload instead of retrying OCR
+        raise HTTPException(
+            status_code=422,
+            detail={"message": "Could not read a complete parlay from the slip", "parsed": parsed_parlay}
+        )
+    return ParlayAnalysisRequest(
+        parlay=ParlayBet(**parsed_parlay),
+        wallet_address=wallet_address
+    )
+
 @router.post("/analyze", response_model=ParlayAnalysisResponse)
 async def analyze_parlay(request: ParlayAnalysisRequest):
     try:
@@ -46,28 +127,135 @@ async def analyze_parlay(request: ParlayAnalysisRequest):
             for bet in request.parlay.individual_bets
         ])
         
-        overall_score = analyzer.calculate_overall_confidence(individual_analyses)
-        show_solana = analyzer.should_suggest_solana(overall_score)
-        
         # Create response
-        response = ParlayAnalysisResponse(
-            overall_score=overall_score,
-            individual_analyses=individual_analyses,
-            should_show_solana=show_solana
-        )
+        response = analyzer.build_parlay_response(individual_analyses)
         
-        # Save to database
-        await Database.save_analysis({
-            "wallet_address": request.wallet_address,
-            "total_odds": request.parlay.total_odds,
-            "bets": [bet.dict() for bet in request.parlay.individual_bets],
-            "overall_score": overall_score,
-            "individual_analyses": [analysis.dict() for analysis in individual_analyses],
-            "should_show_solana": show_solana
-        })
+        # Save to database (write-behind, so usually off the response path)
+        await AnalysisWriter.save(_analysis_document(request, response))
         
         return response
     
     except Exception as e:
-        print(f"Error in analyze_parlay: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        logger.exception("Error in analyze_parlay: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/analyze/stream")
+async def analyze_parlay_stream(request: ParlayAnalysisRequest):
+    return _event_stream(_stream_analysis(request))
+
+def _event_stream(events: AsyncIterator[str], headers: Optional[Dict] = None) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream and defeating early delivery
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **(headers or {})}
+    )
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def _stream_analysis(
+    request: ParlayAnalysisRequest, parsed: bool = False, warnings: Optional[List[str]] = None
+) -> AsyncIterator[str]:
+    """Server-Sent Events: parsed legs, then each leg's analysis as it finishes, then the overall score."""
+    bets = request.parlay.individual_bets
+    if parsed:
+        yield _sse("parsed", {**request.parlay.dict(), "warnings": warnings or []})
+
+    async def analyze_leg(index: int) -> Tuple[int, BetAnalysis]:
+        try:
+            return index, await asyncio.wait_for(analyzer.analyze_bet(bets[index]), LEG_TIMEOUT)
+        except asyncio.TimeoutError:
+            # A slow upstream fetch should not hold up the rest of the parlay
+            return index, analyzer._basic_analysis(bets[index])
+
+    tasks = [asyncio.ensure_future(analyze_leg(i)) for i in range(len(bets))]
+    individual_analyses: List[Optional[BetAnalysis]] = [None] * len(bets)
+    try:
+        for next_leg in asyncio.as_completed(tasks):
+            index, analysis = await next_leg
+            individual_analyses[index] = analysis
+            yield _sse("leg", {"index": index, "analysis": analysis.dict()})
+
+        response = analyzer.build_parlay_response(individual_analyses)
+        yield _sse("overall", {
+            "overall_score": response.overall_score,
+            "should_show_solana": response.should_show_solana,
+            "degraded": response.degraded
+        })
+
+        await AnalysisWriter.save(_analysis_document(request, response))
+        yield _sse("done", {})
+    except Exception as e:
+        logger.exception("Error in stream analysis: %s", e)
+        yield _sse("error", {"detail": str(e)})
+    finally:
+        # The client may disconnect mid-stream; do not leave legs running
+        for task in tasks:
+            task.cancel()
+
+@router.post("/analyze/batch", response_model=BatchAnalysisResponse)
+async def analyze_parlay_batch(request: BatchAnalysisRequest):
+    if len(request.parlays) > BATCH_MAX_PARLAYS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(request.parlays)} parlays; the limit is {BATCH_MAX_PARLAYS}"
+        )
+    try:
+        # One planning pass fetches each team's and matchup's data once for the whole batch
+        all_analyses = await analyzer.analyze_parlays([item.parlay for item in request.parlays])
+
+        results = [analyzer.build_parlay_response(analyses) for analyses in all_analyses]
+
+        if results:
+            await AnalysisWriter.save_many([
+                _analysis_document(item, result)
+                for item, result in zip(request.parlays, results)
+            ])
+
+        return BatchAnalysisResponse(results=results)
+
+    except Exception as e:
+        logger.exception("Error in analyze_parlay_batch: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/history/{wallet_address}", response_model=AnalysisHistoryResponse)
+async def get_analysis_history(
+    wallet_address: str,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
+):
+    try:
+        docs, next_cursor = await Database.get_analysis_page(wallet_address, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return AnalysisHistoryResponse(
+        analyses=[AnalysisSummary(id=str(doc.pop("_id")), **doc) for doc in docs],
+        next_cursor=next_cursor
+    )
+
+@router.get("/stats/wallet/{wallet_address}", response_model=WalletStats)
+async def get_wallet_stats(wallet_address: str):
+    stats = await Rollups.get_wallet_stats(wallet_address)
+    if stats is None:
+        raise HTTPException(status_code=404, detail=f"No analyses for wallet {wallet_address}")
+    return stats
+
+@router.get("/stats/team/{team}", response_model=TeamStats)
+async def get_team_stats(team: str):
+    stats = await Rollups.get_team_stats(team)
+    if stats is None:
+        raise HTTPException(status_code=404, detail=f"No analyses for team {team}")
+    return stats
+
+def _analysis_document(request: ParlayAnalysisRequest, response: ParlayAnalysisResponse) -> dict:
+    return {
+        "wallet_address": request.wallet_address,
+        "total_odds": request.parlay.total_odds,
+        "bets": [bet.dict() for bet in request.parlay.individual_bets],
+        "overall_score": response.overall_score,
+        "individual_analyses": [analysis.dict() for analysis in response.individual_analyses],
+        "should_show_solana": response.should_show_solana,
+        "degraded": response.degraded
+    }
\ No newline at end of file
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+import os
+from pymongo.errors import BulkWriteError
+from ..database import Database
+from ..metrics import span
+from .rollups import Rollups
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisWriter:
+    """Write-behind buffer that takes Database.save_analysis off the response path.
+
+    Analyses are queued and written with insert_many once ANALYSIS_BATCH_SIZE are
+    waiting or every ANALYSIS_FLUSH_INTERVAL seconds. ANALYSIS_WRITE_MODE picks the
+    durability trade-off:
+
+    - "buffered": save() returns immediately (fire-and-forget); failed batches are
+      re-queued while there is room.
+    - "acknowledged": save() returns once its batch is written and raises if it
+      failed. Batches flush as soon as the previous one finishes (group commit).
+    """
+    MODE = os.getenv("ANALYSIS_WRITE_MODE", "buffered").lower()
+    BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", "100"))
+    FLUSH_INTERVAL = float(os.getenv("ANALYSIS_FLUSH_INTERVAL", "1.0"))
+    MAX_QUEUE = int(os.getenv("ANALYSIS_MAX_QUEUE", "10000"))
+
+    _buffer: List[Tuple[dict, Optional[asyncio.Future]]] = []
+    _task: Optional[asyncio.Task] = None
+    _wakeup: Optional[asyncio.Event] = None
+    _stopping: Optional[asyncio.Event] = None
+    _flush_lock: Optional[asyncio.Lock] = None
+    stats = {
+        "queued": 0,
+        "written": 0,
+        "failed": 0,
+        "dropped": 0,
+        "rollup_errors": 0,
+        "flushes": 0,
+        "last_flush_seconds": 0.0,
+        "max_flush_seconds": 0.0,
+    }
+
+    @classmethod
+    async def start(cls):
+        if cls._task is None:
+            cls._wakeup = asyncio.Event()
+            cls._stopping = asyncio.Event()
+            cls._flush_lock = asyncio.Lock()
+            cls._task = asyncio.ensure_future(cls._run())
+
+    @classmethod
+    async def stop(cls):
+        """Stop the flusher and drain whatever is still queued."""
+        if cls._task is not None:
+            # Let an in-flight flush finish; cancelling it would lose a batch already taken off the buffer
+            cls._stopping.set()
+            cls._wakeup.set()
+            await cls._task
+            cls._task = None
+        if cls._flush_lock is None:
+            cls._flush_lock = asyncio.Lock()
+        while cls._buffer:
+            if not await cls.flush():
+                break
+
+    @classmethod
+    async def save(cls, data: dict):
+        await cls.save_many([data])
+
+    @classmethod
+    async def save_many(cls, data: List[dict]):
+        if cls._task is None:
+            # Outside the app lifespan (scripts) write straight through
+            await Database.save_analyses(data)
+            await cls._apply_rollups(data)
+            return
+
+        timestamp = datetime.utcnow()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for doc in data:
+            doc.setdefault("timestamp", timestamp)
+            future = loop.create_future() if cls.MODE == "acknowledged" else None
+            cls._buffer.append((doc, future))
+            if future is not None:
+                futures.append(future)
+        cls.stats["queued"] += len(data)
+
+        if futures or len(cls._buffer) >= cls.BATCH_SIZE:
+            cls._wakeup.set()
+        if len(cls._buffer) >= cls.MAX_QUEUE:
+            # The database is falling behind; make this caller wait for a flush
+            if not await cls.flush():
+                cls._drop_overflow()
+        if futures:
+            await asyncio.gather(*futures)
+
+    @classmethod
+    async def _run(cls):
+        while not cls._stopping.is_set():
+            try:
+                await asyncio.wait_for(cls._wakeup.wait(), timeout=cls.FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            cls._wakeup.clear()
+            while cls._buffer:
+                if not await cls.flush():
+                    break  # Database trouble; retry on the next tick instead of spinning
+                if len(cls._buffer) < cls.BATCH_SIZE and cls.MODE != "acknowledged":
+                    break
+
+    @classmethod
+    async def flush(cls) -> bool:
+        """Write one batch; returns False if any of it failed."""
+        async with cls._flush_lock:
+            batch = cls._buffer[:cls.BATCH_SIZE]
+            if not batch:
+                return True
+            del cls._buffer[:len(batch)]
+
+            started = time.perf_counter()
+            failed, error = [], None
+            skipped_indexes = set()
+            try:
+                await Database.save_analyses([doc for doc, _ in batch])
+            except BulkWriteError as e:
+                # Duplicate keys are documents a previous, partly failed flush already wrote
+                skipped_indexes = {err["index"] for err in e.details.get("writeErrors", [])}
+                failed_indexes = {
+                    err["index"] for err in e.details.get("writeErrors", []) if err.get("code") != 11000
+                }
+                failed, error = [batch[i] for i in sorted(failed_indexes)], e
+            except Exception as e:
+                failed, error = batch, e
+                skipped_indexes = set(range(len(batch)))
+            finally:
+                elapsed = time.perf_counter() - started
+                cls.stats["flushes"] += 1
+                cls.stats["last_flush_seconds"] = elapsed
+                cls.stats["max_flush_seconds"] = max(cls.stats["max_flush_seconds"], elapsed)
+
+            await cls._apply_rollups([doc for i, (doc, _) in enumerate(batch) if i not in skipped_indexes])
+
+            failed_ids = {id(doc) for doc, _ in failed}
+            for doc, future in batch:
+                if id(doc) not in failed_ids and future is not None and not future.done():
+                    future.set_result(None)
+            cls.stats["written"] += len(batch) - len(failed)
+            if not failed:
+                return True
+
+            logger.error("Error flushing %d analyses: %s", len(failed), error)
+            cls.stats["failed"] += len(failed)
+            retry = []
+            for doc, future in failed:
+                if future is not None:
+                    if not future.done():
+                        future.set_exception(error)
+                else:
+                    retry.append((doc, None))
+            # Keep fire-and-forget writes for the next flush while there is room
+            room = max(0, cls.MAX_QUEUE - len(cls._buffer))
+            cls._buffer[:0] = retry[:room]
+            cls.stats["dropped"] += len(retry) - len(retry[:room])
+            return False
+
+    @classmethod
+    async def _apply_rollups(cls, docs: List[dict]):
+        # Rollups are derived data; a failure here must not fail or retry the analyses write
+        try:
+            with span("rollup_write"):
+                await Rollups.apply(docs)
+        except Exception as e:
+            logger.warning("Error updating rollups: %s", e)
+            cls.stats["rollup_errors"] += 1
+
+    @classmethod
+    def _drop_overflow(cls):
+        # Bound memory while the database is down by dropping the oldest fire-and-forget writes
+        overflow = len(cls._buffer) - cls.MAX_QUEUE
+        if overflow <= 0:
+            return
+        kept = []
+        for entry in cls._buffer:
+            if overflow > 0 and entry[1] is None:
+                overflow -= 1
+                cls.stats["dropped"] += 1
+            else:
+                kept.append(entry)
+        cls._buffer[:] = kept
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        return {"mode": cls.MODE, "queue_depth": len(cls._buffer), **cls.stats}
@@ -1,6 +1,18 @@
-from typing import List, Dict
-from ..models.bet import Bet, BetAnalysis
+import asyncio
+import logging
+import math
+import time
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+import os
+from ..models.bet import Bet, BetAnalysis, ParlayBet, ParlayAnalysisResponse
 from ..services.nfl_client import NFLClient
+from ..services.game_table import GameTable
+from ..services.ingestion import GameIngestor
+from ..services.matchup_table import MatchupTable
+from ..metrics import span
+
+logger = logging.getLogger(__name__)
 
 class BetAnalyzer:
     def __init__(self):
@@ -9,46 +21,301 @@ class BetAnalyzer:
             'HEAD_TO_HEAD': 0.40,   # Last season matchups
         }
         self.nfl_client = NFLClient()  # Create instance
+        # Columnar season results; when warm, legs are scored without any API calls
+        self.game_table: Optional[GameTable] = None
+        self.GAME_TABLE_MAX_AGE = int(os.getenv("GAME_TABLE_MAX_AGE", str(6 * 3600)))
+        # Finished analyses for the upcoming slate; the common leg is a dict lookup
+        self.matchup_table = MatchupTable()
+        # Recent form and head-to-head say who wins, not by how much or how many points
+        self.SCORED_BET_TYPES = {"moneyline"}
 
     async def analyze_bet(self, bet: Bet) -> BetAnalysis:
         """Analyze a single bet to calculate confidence score and factors."""
+        if not self._is_scored(bet):
+            return self._unscored_analysis(bet)
         try:
             # Get team IDs using the updated get_team_id method
-            team_id = await self.nfl_client.get_team_id(bet.team)
-            opponent_id = await self.nfl_client.get_team_id(bet.opponent)
+            with span("team_resolution"):
+                team_id = await self.nfl_client.get_team_id(bet.team)
+                opponent_id = await self.nfl_client.get_team_id(bet.opponent)
+
+            analysis = self.matchup_table.lookup(team_id, opponent_id)
+            if analysis is not None:
+                return analysis
+            return await self._score_matchup(bet, team_id, opponent_id)
+
+        except Exception as e:
+            logger.warning("Error analyzing bet: %s", e)
+            return self._basic_analysis(bet)
+
+    async def _score_matchup(self, bet: Bet, team_id: int, opponent_id: int) -> BetAnalysis:
+        scores = self._table_scores(team_id, opponent_id)
+        if scores is not None:
+            with span("scoring"):
+                return self._build_analysis(bet, *scores)
 
-            # Fetch recent form and head-to-head data
+        # Fetch recent form and head-to-head data
+        with span("stats_fetch"):
             recent_games = await self.nfl_client.get_last_5_games(team_id)
             h2h_games = await self.nfl_client.get_h2h_last_season(team_id, opponent_id)
 
-            # Calculate scores
-            recent_form_score = self.calculate_win_percentage(recent_games, team_id)
-            h2h_score = self.calculate_win_percentage(h2h_games, team_id)
+        with span("scoring"):
+            return self.score_bet(bet, team_id, opponent_id, recent_games, h2h_games)
 
-            # Calculate weighted final score
-            final_score = (
-                recent_form_score * self.WEIGHTS['RECENT_FORM'] +
-                h2h_score * self.WEIGHTS['HEAD_TO_HEAD']
-            )
+    def score_bet(
+        self, bet: Bet, team_id: int, opponent_id: int, recent_games: Dict, h2h_games: Dict
+    ) -> BetAnalysis:
+        """Score a bet from already-fetched recent form and head-to-head games."""
+        # An upstream failure is missing data, not a 0% record
+        recent_missing = recent_games.get("degraded", False)
+        h2h_missing = h2h_games.get("degraded", False)
+        if recent_missing and h2h_missing:
+            return self._basic_analysis(bet)
+
+        # Same rules as the game table: newest completed games, and only games between the two teams
+        recent_form_score = None if recent_missing else self.calculate_win_percentage(
+            self._recent_games(recent_games, team_id), team_id
+        )
+        h2h_score = None if h2h_missing else self.calculate_win_percentage(
+            self._meetings(h2h_games, team_id, opponent_id), team_id
+        )
+        return self._build_analysis(bet, recent_form_score, h2h_score, degraded=recent_missing or h2h_missing)
+
+    @staticmethod
+    def _completed(games: List[Dict]) -> List[Dict]:
+        return [
+            game for game in games
+            if game.get("home_team_score") is not None and game.get("visitor_team_score") is not None
+        ]
 
-            # Generate analysis factors
-            factors = self._generate_factors(recent_form_score, h2h_score, bet.opponent)
+    def _recent_games(self, games: Dict, team_id: int, last_n: int = 5) -> Dict:
+        """The team's last_n completed games, newest first, as GameTable.recent_form counts them."""
+        played = [
+            game for game in self._completed(games.get("data", []))
+            if team_id in (game["home_team"]["id"], game["visitor_team"]["id"])
+        ]
+        # ISO dates sort chronologically as strings
+        played.sort(key=lambda game: game.get("date") or "", reverse=True)
+        return {"data": played[:last_n]}
 
-            return BetAnalysis(
-                confidence_score=round(final_score),
-                factors=factors,
-                recommendation=self._get_recommendation(final_score)
+    def _meetings(self, games: Dict, team_id: int, opponent_id: int) -> Dict:
+        """Completed games between exactly these two teams, as GameTable.head_to_head counts them."""
+        pair = {team_id, opponent_id}
+        return {"data": [
+            game for game in self._completed(games.get("data", []))
+            if {game["home_team"]["id"], game["visitor_team"]["id"]} == pair
+        ]}
+
+    def _build_analysis(
+        self, bet: Bet, recent_form_score: Optional[float], h2h_score: Optional[float], degraded: bool = False
+    ) -> BetAnalysis:
+        """Combine the scores into an analysis; a None score has no games behind it and is left out.
+
+        degraded marks scores missing because the stats API failed, not because no games were played.
+        """
+        # Calculate weighted final score, re-weighting over the scores we have
+        weighted = [
+            (score, self.WEIGHTS[name])
+            for score, name in ((recent_form_score, 'RECENT_FORM'), (h2h_score, 'HEAD_TO_HEAD'))
+            if score is not None
+        ]
+        if weighted:
+            final_score = sum(score * weight for score, weight in weighted) / sum(w for _, w in weighted)
+        else:
+            # Neither team has played a game we can count; stay neutral rather than call it 0%
+            final_score = 50.0
+
+        # Generate analysis factors
+        factors = self._generate_factors(recent_form_score, h2h_score, bet.opponent)
+        if not weighted:
+            factors.append("No completed games to score yet")
+        if degraded:
+            factors.append("Some stats unavailable; score based on partial data")
+
+        return BetAnalysis(
+            confidence_score=round(final_score),
+            factors=factors,
+            recommendation=self._get_recommendation(final_score),
+            degraded=degraded
+        )
+
+    async def analyze_parlays(self, parlays: List[ParlayBet]) -> List[List[BetAnalysis]]:
+        """Analyze many parlays, resolving each team and fetching each matchup's data only once."""
+        bets = [bet for parlay in parlays for bet in parlay.individual_bets]
+
+        # Plan the unique data needs across every leg before touching the API
+        names = list({name for bet in bets for name in (bet.team, bet.opponent)})
+        with span("team_resolution"):
+            resolved = await asyncio.gather(*[self._resolve_team_id(name) for name in names])
+        team_ids = dict(zip(names, resolved))
+
+        legs = {}
+        table_scores = {}
+        precomputed = {}
+        for bet in bets:
+            team_id, opponent_id = team_ids[bet.team], team_ids[bet.opponent]
+            if team_id is None or opponent_id is None or not self._is_scored(bet):
+                continue
+            analysis = self.matchup_table.lookup(team_id, opponent_id)
+            if analysis is not None:
+                precomputed[(bet.team, bet.opponent)] = analysis
+                continue
+            scores = self._table_scores(team_id, opponent_id)
+            if scores is not None:
+                table_scores[(bet.team, bet.opponent)] = scores
+            else:
+                legs[(bet.team, bet.opponent)] = (team_id, opponent_id)
+
+        recent_ids = list({team_id for team_id, _ in legs.values()})
+        pairs = list(set(legs.values()))
+        with span("stats_fetch"):
+            recent_results, h2h_results = await asyncio.gather(
+                asyncio.gather(*[self.nfl_client.get_last_5_games(team_id) for team_id in recent_ids]),
+                asyncio.gather(*[self.nfl_client.get_h2h_last_season(*pair) for pair in pairs]),
             )
+        recent_games = dict(zip(recent_ids, recent_results))
+        h2h_games = dict(zip(pairs, h2h_results))
+
+        results = []
+        with span("scoring"):
+            for parlay in parlays:
+                analyses = []
+                for bet in parlay.individual_bets:
+                    if not self._is_scored(bet):
+                        analyses.append(self._unscored_analysis(bet))
+                        continue
+                    analysis = precomputed.get((bet.team, bet.opponent))
+                    if analysis is not None:
+                        analyses.append(analysis)
+                        continue
+                    scores = table_scores.get((bet.team, bet.opponent))
+                    if scores is not None:
+                        analyses.append(self._build_analysis(bet, *scores))
+                        continue
+                    leg = legs.get((bet.team, bet.opponent))
+                    if leg is None:
+                        analyses.append(self._basic_analysis(bet))
+                        continue
+                    try:
+                        analyses.append(
+                            self.score_bet(bet, leg[0], leg[1], recent_games[leg[0]], h2h_games[leg])
+                        )
+                    except Exception as e:
+                        logger.warning("Error analyzing bet: %s", e)
+                        analyses.append(self._basic_analysis(bet))
+                results.append(analyses)
+        return results
 
+    async def _resolve_team_id(self, team_name: str) -> Optional[int]:
+        try:
+            return await self.nfl_client.get_team_id(team_name)
+        except Exception:
+            return None
+
+    async def warm_game_table(self) -> bool:
+        """Load recent and last-season results from the local games store (see GameIngestor)."""
+        try:
+            seasons = [self.nfl_client.CURRENT_SEASON, self.nfl_client.LAST_SEASON]
+            self.load_game_table(GameTable(await GameIngestor.load_games(seasons)))
+            return True
         except Exception as e:
-            print(f"Error analyzing bet: {str(e)}")
-            return self._basic_analysis(bet)
+            logger.warning("Error warming game table: %s", e)
+            return False
+
+    async def refresh_from_store(self) -> bool:
+        """Reload the game table, then rebuild the matchup table if results or the slate moved."""
+        warmed = await self.warm_game_table()
+        await self.refresh_matchup_table()
+        return warmed
+
+    async def refresh_matchup_table(self) -> bool:
+        """Precompute both sides of every upcoming matchup, or load them from the snapshot."""
+        try:
+            version = MatchupTable.slate_version(await GameIngestor.results_version())
+            if self.matchup_table.is_current(version):
+                return True
+            # A restarted worker picks up the table another process already built
+            if not self.matchup_table and await self.matchup_table.load_snapshot(version):
+                return True
+
+            with span("matchup_build"):
+                games = await MatchupTable.upcoming_matchups(self.nfl_client.CURRENT_SEASON)
+                names = {team["id"]: team["name"] for team in self.nfl_client.team_index.teams}
+                if not names:
+                    # Without team names there is nothing to label factors with; retry next sync
+                    return False
+                pairs = [
+                    (team_id, opponent_id)
+                    for home_id, visitor_id in games
+                    for team_id, opponent_id in ((home_id, visitor_id), (visitor_id, home_id))
+                    if team_id in names and opponent_id in names
+                ]
+                analyses = await asyncio.gather(*[
+                    self._score_matchup(
+                        Bet(team=names[team_id], opponent=names[opponent_id], bet_type="moneyline", odds=100),
+                        team_id, opponent_id
+                    )
+                    for team_id, opponent_id in pairs
+                ], return_exceptions=True)
+            # Failed and degraded scores stay out so those legs retry the stats API per request
+            self.matchup_table.replace(version, {
+                pair: analysis for pair, analysis in zip(pairs, analyses)
+                if isinstance(analysis, BetAnalysis) and not analysis.degraded
+            })
+            self.matchup_table.stats["builds"] += 1
+            logger.info("Matchup table %s built with %d entries", version, len(self.matchup_table))
+            await self.matchup_table.save_snapshot()
+            return True
+        except Exception as e:
+            logger.warning("Error building matchup table: %s", e)
+            self.matchup_table.stats["errors"] += 1
+            return False
 
+    def load_game_table(self, table: GameTable):
+        # Precompute both seasons' scores once so per-leg lookups are plain indexing
+        table.recent_form(self.nfl_client.CURRENT_SEASON)
+        table.head_to_head(self.nfl_client.LAST_SEASON)
+        self.game_table = table
 
-    def calculate_win_percentage(self, games: Dict, team_id: str) -> float:
-        """Calculate win percentage for a given set of games and team ID."""
-        if not games or "data" not in games:
-            return 0.0
+    def _is_table_warm(self) -> bool:
+        return (
+            self.game_table is not None and
+            self.game_table.game_count > 0 and
+            time.time() - self.game_table.loaded_at < self.GAME_TABLE_MAX_AGE
+        )
+
+    def _table_scores(
+        self, team_id: int, opponent_id: int
+    ) -> Optional[Tuple[Optional[float], Optional[float]]]:
+        """(recent form, head-to-head) win percentages from the game table, if it covers both teams."""
+        if not self._is_table_warm():
+            return None
+        team = self.game_table.index_of(team_id)
+        opponent = self.game_table.index_of(opponent_id)
+        if team is None or opponent is None:
+            return None
+        recent_form = self.game_table.recent_form(self.nfl_client.CURRENT_SEASON)[team]
+        h2h = self.game_table.head_to_head(self.nfl_client.LAST_SEASON)[team, opponent]
+        # NaN means no games (the teams never met); leave it out rather than score it 0%
+        return (
+            None if math.isnan(recent_form) else float(recent_form),
+            None if math.isnan(h2h) else float(h2h),
+        )
+
+    def confidence_matrix(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(team ids, team-vs-opponent confidence matrix) from the warm game table."""
+        if not self._is_table_warm():
+            return None
+        matrix = self.game_table.confidence_matrix(
+            self.nfl_client.CURRENT_SEASON, self.nfl_client.LAST_SEASON, self.WEIGHTS
+        )
+        return self.game_table.team_ids, matrix
+
+
+    def calculate_win_percentage(self, games: Dict, team_id: int) -> Optional[float]:
+        """Win percentage over a set of completed games, or None if there are none."""
+        if not games or not games.get("data"):
+            return None
 
         wins = 0
         for game in games["data"]:
@@ -58,18 +325,23 @@ class BetAnalyzer:
             ):
                 wins += 1
 
-        return (wins / len(games["data"])) * 100 if games["data"] else 0.0
+        return (wins / len(games["data"])) * 100
 
-    def _generate_factors(self, recent_form_score: float, h2h_score: float, opponent: str) -> List[str]:
+    def _generate_factors(
+        self, recent_form_score: Optional[float], h2h_score: Optional[float], opponent: str
+    ) -> List[str]:
         """Generate factors explaining the confidence score."""
         factors = []
 
         # Recent form factor
-        recent_wins = int(recent_form_score * 5 / 100)  # Approximate wins out of 5
-        factors.append(f"Won {recent_wins} of last 5 games")
+        if recent_form_score is not None:
+            recent_wins = int(recent_form_score * 5 / 100)  # Approximate wins out of 5
+            factors.append(f"Won {recent_wins} of last 5 games")
 
         # Head-to-head factor
-        if h2h_score > 50:
+        if h2h_score is None:
+            pass
+        elif h2h_score > 50:
             factors.append(f"Won {int(h2h_score)}% vs {opponent} last season")
         elif h2h_score < 50:
             factors.append(f"Struggled vs {opponent} last season")
@@ -89,7 +361,20 @@ class BetAnalyzer:
         return BetAnalysis(
             confidence_score=50,
             factors=["Basic odds analysis only", "Unable to fetch detailed stats"],
-            recommendation="POSSIBLE"
+            recommendation="POSSIBLE",
+            degraded=True
+        )
+
+    def _is_scored(self, bet: Bet) -> bool:
+        return bet.bet_type.lower() in self.SCORED_BET_TYPES
+
+    def _unscored_analysis(self, bet: Bet) -> BetAnalysis:
+        """Neutral analysis for spreads, totals and props, which win/loss records cannot score."""
+        return BetAnalysis(
+            confidence_score=50,
+            factors=[f"{bet.bet_type.capitalize()} legs are not scored; only moneylines are"],
+            recommendation="POSSIBLE",
+            scored=False
         )
 
     def calculate_overall_confidence(self, analyses: List[BetAnalysis]) -> int:
@@ -97,6 +382,16 @@ class BetAnalyzer:
         scores = [analysis.confidence_score for analysis in analyses]
         return round(sum(scores) / len(scores)) if scores else 0
 
+    def build_parlay_response(self, analyses: List[BetAnalysis]) -> ParlayAnalysisResponse:
+        """Overall score, Solana suggestion and degraded flag for a parlay's leg analyses."""
+        overall_score = self.calculate_overall_confidence(analyses)
+        return ParlayAnalysisResponse(
+            overall_score=overall_score,
+            individual_analyses=analyses,
+            should_show_solana=self.should_suggest_solana(overall_score),
+            degraded=any(analysis.degraded for analysis in analyses)
+        )
+
     def should_suggest_solana(self, overall_score: int) -> bool:
         """Determine whether to suggest Solana purchase based on overall score."""
         return overall_score < 72
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from datetime import datetime
+import os
+from ..database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCacheBackend:
+    """In-process LRU store. Each entry is (value, fresh_until, stale_until) in epoch seconds."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float, float]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, value: Any, fresh_until: float, stale_until: float):
+        self._entries[key] = (value, fresh_until, stale_until)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MongoCacheBackend:
+    """Cache shared by every uvicorn worker through the `api_cache` collection.
+
+    Mongo's TTL monitor drops entries once they are past their stale window.
+    """
+    COLLECTION = "api_cache"
+
+    def __init__(self):
+        self._indexed = False
+
+    def _collection(self):
+        return Database.db[self.COLLECTION]
+
+    async def _ensure_index(self):
+        if not self._indexed:
+            await self._collection().create_index("purge_at", expireAfterSeconds=0)
+            self._indexed = True
+
+    async def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        doc = await self._collection().find_one({"_id": key})
+        if doc is None or doc["stale_until"] <= time.time():
+            return None
+        return doc["value"], doc["fresh_until"], doc["stale_until"]
+
+    async def set(self, key: str, value: Any, fresh_until: float, stale_until: float):
+        await self._ensure_index()
+        await self._collection().replace_one(
+            {"_id": key},
+            {
+                "value": value,
+                "fresh_until": fresh_until,
+                "stale_until": stale_until,
+                "purge_at": datetime.utcfromtimestamp(stale_until),
+            },
+            upsert=True,
+        )
+
+    async def delete(self, key: str):
+        await self._collection().delete_one({"_id": key})
+
+
+class TTLCache:
+    """Read-through cache with per-namespace TTLs and stale-while-revalidate.
+
+    A fresh entry is returned as is. An entry past its TTL but still inside its
+    stale window is returned immediately while a single background task refreshes
+    it. Anything older is fetched inline.
+    """
+
+    def __init__(self, backend, ttls: Dict[str, int], stale_ttls: Optional[Dict[str, int]] = None):
+        self.backend = backend
+        self.ttls = ttls
+        self.stale_ttls = stale_ttls or {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    def _count(self, namespace: str, event: str):
+        counters = self.stats.setdefault(
+            namespace, {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "errors": 0}
+        )
+        counters[event] += 1
+
+    async def get_or_fetch(self, namespace: str, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, calling fetch() on a miss.
+
+        fetch() should raise on upstream failure so errors are never cached.
+        """
+        cache_key = f"{namespace}:{key}"
+        try:
+            entry = await self.backend.get(cache_key)
+        except Exception as e:
+            logger.warning("Error reading cache entry %s: %s", cache_key, e)
+            self._count(namespace, "errors")
+            entry = None
+
+        now = time.time()
+        if entry is not None:
+            value, fresh_until, _ = entry
+            if fresh_until > now:
+                self._count(namespace, "hits")
+                return value
+            self._count(namespace, "stale_hits")
+            self._schedule_refresh(namespace, cache_key, fetch)
+            return value
+
+        self._count(namespace, "misses")
+        value = await fetch()
+        await self._store(namespace, cache_key, value)
+        return value
+
+    async def _store(self, namespace: str, cache_key: str, value: Any):
+        ttl = self.ttls.get(namespace, 0)
+        if ttl <= 0:
+            return
+        fresh_until = time.time() + ttl
+        stale_until = fresh_until + self.stale_ttls.get(namespace, 0)
+        try:
+            await self.backend.set(cache_key, value, fresh_until, stale_until)
+        except Exception as e:
+            logger.warning("Error writing cache entry %s: %s", cache_key, e)
+            self._count(namespace, "errors")
+
+    def _schedule_refresh(self, namespace: str, cache_key: str, fetch: Callable[[], Awaitable[Any]]):
+        if cache_key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                value = await fetch()
+                await self._store(namespace, cache_key, value)
+                self._count(namespace, "refreshes")
+            except Exception as e:
+                logger.warning("Error refreshing cache entry %s: %s", cache_key, e)
+                self._count(namespace, "errors")
+            finally:
+                self._refreshing.pop(cache_key, None)
+
+        self._refreshing[cache_key] = asyncio.ensure_future(refresh())
+
+    async def invalidate(self, namespace: str, key: str):
+        await self.backend.delete(f"{namespace}:{key}")
+
+    def get_stats(self) -> Dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend) if hasattr(self.backend, "__len__") else None,
+            "namespaces": self.stats,
+        }
+
+
+def build_cache(ttls: Dict[str, int], stale_ttls: Optional[Dict[str, int]] = None) -> TTLCache:
+    """Create a TTLCache using the backend selected by CACHE_BACKEND (memory or mongo)."""
+    backend_name = os.getenv("CACHE_BACKEND", "memory").lower()
+    if backend_name == "mongo":
+        backend = MongoCacheBackend()
+    else:
+        backend = MemoryCacheBackend(max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1024")))
+    return TTLCache(backend, ttls, stale_ttls)
@@ -0,0 +1,121 @@
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+
+def normalize_game(game: Dict) -> Dict:
+    """Flatten a balldontlie game into the fields scoring needs."""
+    date = game.get("date")
+    if date:
+        parsed = datetime.fromisoformat(date.replace("Z", "+00:00"))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    else:
+        parsed = None
+    return {
+        "id": game["id"],
+        "season": game.get("season"),
+        "week": game.get("week"),
+        "postseason": game.get("postseason", False),
+        "status": game.get("status"),
+        "date": parsed,
+        "home_team_id": game["home_team"]["id"],
+        "visitor_team_id": game["visitor_team"]["id"],
+        "home_team_score": game.get("home_team_score"),
+        "visitor_team_score": game.get("visitor_team_score"),
+    }
+
+
+class GameTable:
+    """Completed games stored column-wise so every team's form and every matchup score at once.
+
+    Each game becomes two rows, one from each team's point of view, which turns
+    "wins for team X" into plain bincount/add.at reductions over integer indexes.
+    """
+
+    def __init__(self, games: List[Dict]):
+        completed = [
+            game for game in games
+            if game["home_team_score"] is not None and game["visitor_team_score"] is not None
+        ]
+        self.loaded_at = time.time()
+        self.game_count = len(completed)
+
+        home = np.array([g["home_team_id"] for g in completed], dtype=np.int64)
+        visitor = np.array([g["visitor_team_id"] for g in completed], dtype=np.int64)
+        home_score = np.array([g["home_team_score"] for g in completed], dtype=np.int64)
+        visitor_score = np.array([g["visitor_team_score"] for g in completed], dtype=np.int64)
+        season = np.array([g["season"] or 0 for g in completed], dtype=np.int64)
+        date = np.array(
+            [g["date"] or datetime.min for g in completed], dtype="datetime64[s]"
+        )
+
+        self.team_ids = np.unique(np.concatenate([home, visitor]))
+        self._team_index = {int(team_id): i for i, team_id in enumerate(self.team_ids)}
+
+        # Row i and row i + n describe game i from the home and visitor side
+        self.team = np.searchsorted(self.team_ids, np.concatenate([home, visitor]))
+        self.opponent = np.searchsorted(self.team_ids, np.concatenate([visitor, home]))
+        self.won = np.concatenate([home_score > visitor_score, visitor_score > home_score])
+        self.season = np.concatenate([season, season])
+        self.date = np.concatenate([date, date])
+
+        self._recent_form: Dict[Tuple[int, int], np.ndarray] = {}
+        self._head_to_head: Dict[int, np.ndarray] = {}
+
+    @classmethod
+    def from_api_games(cls, games: List[Dict]) -> "GameTable":
+        return cls([normalize_game(game) for game in games])
+
+    @property
+    def size(self) -> int:
+        return len(self.team_ids)
+
+    def index_of(self, team_id: int) -> Optional[int]:
+        return self._team_index.get(int(team_id))
+
+    def recent_form(self, season: int, last_n: int = 5) -> np.ndarray:
+        """Win percentage over each team's last_n completed games of a season (NaN if none)."""
+        key = (season, last_n)
+        if key not in self._recent_form:
+            rows = np.flatnonzero(self.season == season)
+            # Sort each team's rows newest first, then rank rows within their team
+            order = rows[np.lexsort((-self.date[rows].astype(np.int64), self.team[rows]))]
+            teams = self.team[order]
+            group_start = np.searchsorted(teams, teams, side="left")
+            rank = np.arange(len(order)) - group_start
+            recent = order[rank < last_n]
+
+            wins = np.bincount(self.team[recent], weights=self.won[recent], minlength=self.size)
+            games = np.bincount(self.team[recent], minlength=self.size)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                self._recent_form[key] = np.where(games > 0, wins / games * 100, np.nan)
+        return self._recent_form[key]
+
+    def head_to_head(self, season: int) -> np.ndarray:
+        """Matrix of team-vs-opponent win percentage in a season (NaN where they did not meet)."""
+        if season not in self._head_to_head:
+            rows = self.season == season
+            wins = np.zeros((self.size, self.size))
+            games = np.zeros((self.size, self.size))
+            np.add.at(wins, (self.team[rows], self.opponent[rows]), self.won[rows])
+            np.add.at(games, (self.team[rows], self.opponent[rows]), 1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                self._head_to_head[season] = np.where(games > 0, wins / games * 100, np.nan)
+        return self._head_to_head[season]
+
+    def confidence_matrix(self, recent_season: int, h2h_season: int, weights: Dict[str, float]) -> np.ndarray:
+        """Confidence for every team (rows) against every opponent (columns).
+
+        Matches BetAnalyzer._build_analysis: a stat with no games (NaN) is left out and
+        the other re-weighted, and a pair with neither scores a neutral 50.
+        """
+        form = np.broadcast_to(self.recent_form(recent_season)[:, None], (self.size, self.size))
+        h2h = self.head_to_head(h2h_season)
+        form_weight = np.where(np.isnan(form), 0.0, weights['RECENT_FORM'])
+        h2h_weight = np.where(np.isnan(h2h), 0.0, weights['HEAD_TO_HEAD'])
+        total = np.nan_to_num(form) * form_weight + np.nan_to_num(h2h) * h2h_weight
+        weight = form_weight + h2h_weight
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(weight > 0, total / weight, 50.0)
@@ -0,0 +1,82 @@
+import asyncio
+import httpx
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import os
+
+
+class HTTPClient:
+    """Application-lifetime pooled HTTP client shared by the upstream API clients."""
+    client: Optional[httpx.AsyncClient] = None
+    _in_flight: Dict[Tuple, asyncio.Future] = {}
+
+    MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+
+    @classmethod
+    async def connect(cls):
+        if cls.client is not None:
+            return
+        cls.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=cls.MAX_CONNECTIONS,
+                max_keepalive_connections=cls.MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=cls.KEEPALIVE_EXPIRY,
+            ),
+            timeout=cls.TIMEOUT,
+        )
+
+    @classmethod
+    async def close(cls):
+        if cls.client is not None:
+            await cls.client.aclose()
+            cls.client = None
+        cls._in_flight.clear()
+
+    @classmethod
+    async def get_client(cls) -> httpx.AsyncClient:
+        # Scripts and workers outside the app lifespan still get a pooled client
+        if cls.client is None:
+            await cls.connect()
+        return cls.client
+
+    @classmethod
+    async def get(
+        cls,
+        url: str,
+        params: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        send: Optional[Callable[[str, Optional[Dict], Optional[Dict]], Awaitable[httpx.Response]]] = None
+    ) -> httpx.Response:
+        """GET a URL, sharing one upstream request between identical concurrent callers.
+
+        send replaces the plain request, e.g. to wrap it in retry and rate-limit policy.
+        """
+        key = cls._request_key(url, params, headers)
+        future = cls._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future((send or cls.send)(url, params, headers))
+            cls._in_flight[key] = future
+            future.add_done_callback(lambda _: cls._in_flight.pop(key, None))
+        # Shield so one cancelled caller does not cancel the request for everyone else
+        return await asyncio.shield(future)
+
+    @classmethod
+    async def send(cls, url: str, params: Optional[Dict], headers: Optional[Dict]) -> httpx.Response:
+        client = await cls.get_client()
+        return await client.get(url, params=params, headers=headers)
+
+    @staticmethod
+    def _request_key(url: str, params: Optional[Dict], headers: Optional[Dict]) -> Tuple:
+        def freeze(values: Optional[Dict]) -> Tuple:
+            items = []
+            for name, value in (values or {}).items():
+                if isinstance(value, (list, tuple)):
+                    value = tuple(str(v) for v in value)
+                else:
+                    value = str(value)
+                items.append((name, value))
+            return tuple(sorted(items))
+
+        return (url, freeze(params), freeze(headers))
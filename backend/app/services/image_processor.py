@@ -1,94 +1,168 @@
-from PIL import Image
+from PIL import Image, ImageOps
 import pytesseract
 import io
-from typing import List, Dict
+import logging
+import shlex
+from dataclasses import dataclass
+from typing import Callable, List, Dict, Optional, Tuple
 from base64 import b64encode
+from .ocr_pool import OCRPool
+from .slip_parser import parse_slip
+from ..metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Everything slip_parser reads: team and player names (Ja'Marr), spread/total/prop lines
+# and odds, plus the ©/® tesseract reads for the pick marker
+SLIP_CHARSET = (
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+    "0123456789+-.,:@$%()/&'©® "
+)
+
+
+@dataclass(frozen=True)
+class OCRProfile:
+    """How to prepare a screenshot from one sportsbook layout for tesseract."""
+    # Width in pixels to downscale to; phone screenshots are ~1200px at 3x, text stays legible at ~900
+    target_width: int = 900
+    # Fractions (left, top, right, bottom) of the image that hold the slip, e.g. to drop status bars
+    crop_box: Tuple[float, float, float, float] = (0.0, 0.0, 1.0, 1.0)
+    # Trim to the bounding box of the text after binarizing
+    auto_crop: bool = True
+    # Dark-mode apps render light text on dark backgrounds; tesseract wants the opposite
+    invert_dark: bool = True
+    # Fixed binarization threshold, or None to pick one per image (Otsu)
+    threshold: Optional[int] = None
+    psm: int = 4
+    whitelist: Optional[str] = SLIP_CHARSET
+
+    def tesseract_config(self) -> str:
+        config = f"--psm {self.psm} -c preserve_interword_spaces=1"
+        if self.whitelist:
+            # pytesseract shlex-splits the config, so the apostrophe needs quoting
+            config += f" -c tessedit_char_whitelist={shlex.quote(self.whitelist.replace(' ', ''))}"
+        return config
+
+
+OCR_PROFILES: Dict[str, OCRProfile] = {
+    "default": OCRProfile(),
+    # Dark theme with a fixed header and bottom tab bar around the bet slip
+    "draftkings": OCRProfile(crop_box=(0.0, 0.08, 1.0, 0.9)),
+    # Light theme; the slip sits in a sheet under the top navigation
+    "fanduel": OCRProfile(crop_box=(0.0, 0.1, 1.0, 0.95), invert_dark=False),
+}
+
 
 class ImageProcessor:
     @staticmethod
-    async def process_bet_image(image_bytes: bytes) -> List[Dict]:
+    async def process_bet_image(
+        image_bytes: bytes, sportsbook: str = "default", is_team: Optional[Callable[[str], bool]] = None
+    ) -> Dict:
         try:
-            # Convert bytes to image using PIL
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # Extract text from image using pytesseract
-            text = pytesseract.image_to_string(image)
-            print("Extracted text from image:", text)  # Debug print
+            # OCR is CPU-bound, so it runs in the worker pool instead of on the event loop
+            with span("ocr"):
+                text = await OCRPool.run(ImageProcessor.extract_text, image_bytes, sportsbook)
+            logger.debug("Extracted text from image: %r", text)
             
             # Parse the text into bets
-            bets = ImageProcessor._parse_bet_text(text)
-            return bets
+            with span("parse"):
+                parsed = ImageProcessor._parse_bet_text(text, sportsbook, is_team)
+            return parsed
             
         except Exception as e:
-            print(f"Error in process_bet_image: {str(e)}")
+            logger.warning("Error in process_bet_image: %s", e)
             raise e
 
     @staticmethod
-    def _parse_bet_text(text: str) -> List[Dict]:
-        lines = text.split('\n')
-        bets = []
-        matchups = []
-        odds_list = []
-        picked_teams = []
-        total_parlay_odds = None
-        
-        # First collect the teams that were picked (marked with ©)
-        for line in lines:
-            if '©' in line:
-                team = line.replace('©', '').strip()
-                picked_teams.append(team)
-        
-        # Then collect matchups and their corresponding odds
-        for line in lines:
-            line = line.strip()
-            if not line:
+    def extract_text(image_bytes: bytes, sportsbook: str = "default") -> str:
+        """Decode, preprocess and OCR an image. Runs inside an OCRPool worker process."""
+        profile = OCR_PROFILES.get(sportsbook, OCR_PROFILES["default"])
+
+        # Convert bytes to image using PIL
+        image = Image.open(io.BytesIO(image_bytes))
+        image = ImageProcessor.preprocess(image, profile)
+
+        # Extract text from image using pytesseract
+        return pytesseract.image_to_string(image, config=profile.tesseract_config())
+
+    @staticmethod
+    def preprocess(image: Image.Image, profile: OCRProfile) -> Image.Image:
+        """Shrink a screenshot to a cropped, binarized image; OCR time scales with pixel count."""
+        # JPEG can decode straight to a smaller grayscale image, skipping most of the work
+        image.draft("L", (profile.target_width, profile.target_width * 4))
+        image = ImageOps.exif_transpose(image).convert("L")
+
+        left, top, right, bottom = profile.crop_box
+        if profile.crop_box != (0.0, 0.0, 1.0, 1.0):
+            width, height = image.size
+            image = image.crop((
+                int(left * width), int(top * height), int(right * width), int(bottom * height)
+            ))
+
+        if image.width > profile.target_width:
+            scale = profile.target_width / image.width
+            image = image.resize(
+                (profile.target_width, max(1, round(image.height * scale))),
+                Image.LANCZOS,
+                reducing_gap=2.0,
+            )
+
+        histogram = image.histogram()
+        if profile.invert_dark and ImageProcessor._mean_level(histogram) < 128:
+            image = ImageOps.invert(image)
+            histogram = histogram[::-1]
+
+        threshold = profile.threshold
+        if threshold is None:
+            threshold = ImageProcessor._otsu_threshold(histogram)
+        image = image.point(lambda level: 255 if level > threshold else 0, mode="1").convert("L")
+
+        if profile.auto_crop:
+            # Text is black after binarizing, so the inverted image's bbox is the text region
+            bbox = ImageOps.invert(image).getbbox()
+            if bbox:
+                pad = 10
+                image = image.crop((
+                    max(0, bbox[0] - pad), max(0, bbox[1] - pad),
+                    min(image.width, bbox[2] + pad), min(image.height, bbox[3] + pad)
+                ))
+        return image
+
+    @staticmethod
+    def _mean_level(histogram: List[int]) -> float:
+        total = sum(histogram)
+        return sum(level * count for level, count in enumerate(histogram)) / total if total else 255
+
+    @staticmethod
+    def _otsu_threshold(histogram: List[int]) -> int:
+        """Pick the gray level that best separates text from background."""
+        total = sum(histogram)
+        level_sum = sum(level * count for level, count in enumerate(histogram))
+        background_sum = 0
+        background_count = 0
+        best_level, best_variance = 127, 0.0
+        for level, count in enumerate(histogram):
+            background_count += count
+            if background_count == 0:
                 continue
-                
-            print(f"Processing line: {line}")
-            
-            # Collect matchup lines
-            if '@' in line and 'Payout' not in line:
-                matchups.append(line)
-                
-            # Collect odds
-            if (line.startswith('+') or line.startswith('-')):
-                try:
-                    odds = int(''.join(filter(lambda x: x.isdigit() or x in '+-', line)))
-                    if total_parlay_odds is None:
-                        total_parlay_odds = odds  # Store total parlay odds
-                        print(f"Total parlay odds: {odds}")
-                        continue
-                    odds_list.append(odds)
-                except ValueError:
-                    continue
-
-        print(f"Found picked teams: {picked_teams}")
-        print(f"Found matchups: {matchups}")
-        print(f"Found individual odds: {odds_list}")
-        print(f"Total parlay odds: {total_parlay_odds}")
-
-        # Now pair them up
-        parlay_info = {
-            "total_odds": total_parlay_odds,
-            "individual_bets": []
-        }
-
-        for i, matchup in enumerate(matchups):
-            if i < len(odds_list):
-                away, home = matchup.split('@')
-                away = away.strip()
-                home = home.strip()
-                
-                picked_team = picked_teams[i]
-                is_home_pick = picked_team == home
-                
-                parlay_info["individual_bets"].append({
-                    "team": picked_team,
-                    "opponent": away if is_home_pick else home,
-                    "bet_type": "moneyline",
-                    "odds": odds_list[i],
-                    "details": {}
-                })
-
-        print("Final parsed parlay:", parlay_info)
-        return parlay_info
\ No newline at end of file
+            foreground_count = total - background_count
+            if foreground_count == 0:
+                break
+            background_sum += level * count
+            background_mean = background_sum / background_count
+            foreground_mean = (level_sum - background_sum) / foreground_count
+            variance = background_count * foreground_count * (background_mean - foreground_mean) ** 2
+            if variance > best_variance:
+                best_level, best_variance = level, variance
+        return best_level
+
+    @staticmethod
+    def _parse_bet_text(
+        text: str, sportsbook: str = "default", is_team: Optional[Callable[[str], bool]] = None
+    ) -> Dict:
+        """Parse OCR text into a parlay dict; malformed slips yield warnings, not exceptions."""
+        parsed = parse_slip(text, sportsbook, is_team).to_dict()
+        if parsed["warnings"]:
+            logger.info("Slip parsed with warnings: %s", parsed["warnings"])
+        logger.debug("Final parsed parlay: %s", parsed)
+        return parsed
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from pymongo import ReplaceOne
+from pymongo.errors import DuplicateKeyError
+import os
+from ..database import Database
+from .game_table import normalize_game
+from .nfl_client import NFLClient
+
+logger = logging.getLogger(__name__)
+
+
+class GameIngestor:
+    """Scheduled sync of full-season results from the stats API into the `games` collection.
+
+    Finished seasons are synced once and then marked complete; open seasons are
+    re-paged each run but only new or changed games are written. When several
+    workers run, a lease in `ingest_state` lets one of them sync per interval.
+    """
+    INTERVAL = int(os.getenv("INGEST_INTERVAL_SECONDS", "3600"))
+    SEASONS = [
+        int(season) for season in os.getenv(
+            "NFL_INGEST_SEASONS", f"{NFLClient.LAST_SEASON},{NFLClient.CURRENT_SEASON}"
+        ).split(",")
+    ]
+
+    _task: Optional[asyncio.Task] = None
+    _holder = uuid.uuid4().hex
+    stats = {"runs": 0, "games_written": 0, "errors": 0, "last_synced_at": None}
+
+    @classmethod
+    async def ensure_indexes(cls):
+        await Database.db.games.create_index([("team_ids", 1), ("season", 1)])
+        await Database.db.games.create_index([("season", 1), ("date", -1)])
+
+    @classmethod
+    async def sync_season(cls, nfl_client: NFLClient, season: int) -> int:
+        """Sync one season and return the number of games inserted or updated."""
+        state = await Database.db.ingest_state.find_one({"_id": f"season:{season}"})
+        if state and state.get("complete"):
+            return 0
+
+        docs = []
+        for game in await nfl_client.get_season_games(season):
+            doc = normalize_game(game)
+            doc["_id"] = doc.pop("id")
+            doc["team_ids"] = [doc["home_team_id"], doc["visitor_team_id"]]
+            docs.append(doc)
+
+        existing = {}
+        async for doc in Database.db.games.find({"season": season}):
+            existing[doc["_id"]] = doc
+        changed = [doc for doc in docs if existing.get(doc["_id"]) != doc]
+        if changed:
+            await Database.db.games.bulk_write(
+                [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in changed],
+                ordered=False
+            )
+            # Every worker's matchup table is rebuilt when this moves
+            await Database.db.ingest_state.update_one(
+                {"_id": "results"}, {"$inc": {"version": 1}}, upsert=True
+            )
+
+        # A past season with every score in will never change again
+        complete = bool(docs) and season < nfl_client.CURRENT_SEASON and all(
+            doc["home_team_score"] is not None and doc["visitor_team_score"] is not None
+            for doc in docs
+        )
+        await Database.db.ingest_state.update_one(
+            {"_id": f"season:{season}"},
+            {"$set": {"synced_at": datetime.utcnow(), "games": len(docs), "complete": complete}},
+            upsert=True
+        )
+        return len(changed)
+
+    @classmethod
+    async def sync(cls, nfl_client: NFLClient) -> int:
+        written = 0
+        for season in cls.SEASONS:
+            written += await cls.sync_season(nfl_client, season)
+        cls.stats["runs"] += 1
+        cls.stats["games_written"] += written
+        cls.stats["last_synced_at"] = datetime.utcnow().isoformat()
+        return written
+
+    @classmethod
+    async def load_games(cls, seasons: List[int]) -> List[Dict]:
+        cursor = Database.db.games.find({"season": {"$in": seasons}})
+        return await cursor.to_list(length=None)
+
+    @classmethod
+    async def results_version(cls) -> int:
+        """Bumped on every sync that writes games; 0 before the first."""
+        state = await Database.db.ingest_state.find_one({"_id": "results"})
+        return state["version"] if state else 0
+
+    @classmethod
+    async def _acquire_lease(cls) -> bool:
+        now = datetime.utcnow()
+        try:
+            await Database.db.ingest_state.find_one_and_update(
+                {"_id": "lease", "expires_at": {"$lt": now}},
+                {"$set": {"expires_at": now + timedelta(seconds=cls.INTERVAL / 2), "holder": cls._holder}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # Another worker holds an unexpired lease
+            return False
+
+    @classmethod
+    def start(cls, nfl_client: NFLClient, on_sync: Callable[[], Awaitable]):
+        """Run the sync loop in the background, calling on_sync after every run."""
+        if cls._task is None:
+            cls._task = asyncio.ensure_future(cls._run_forever(nfl_client, on_sync))
+
+    @classmethod
+    async def stop(cls):
+        if cls._task is not None:
+            cls._task.cancel()
+            try:
+                await cls._task
+            except asyncio.CancelledError:
+                pass
+            cls._task = None
+
+    @classmethod
+    async def _run_forever(cls, nfl_client: NFLClient, on_sync: Callable[[], Awaitable]):
+        while True:
+            try:
+                if await cls._acquire_lease():
+                    written = await cls.sync(nfl_client)
+                    logger.info("Game ingestion wrote %d games", written)
+            except Exception as e:
+                logger.warning("Error ingesting games: %s", e)
+                cls.stats["errors"] += 1
+            # Reload even after a failed sync; the local store is still the best data we have
+            await on_sync()
+            await asyncio.sleep(cls.INTERVAL)
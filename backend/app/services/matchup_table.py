@@ -0,0 +1,106 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import os
+from ..database import Database
+from ..models.bet import BetAnalysis
+
+logger = logging.getLogger(__name__)
+
+
+class MatchupTable:
+    """Precomputed leg analyses for both sides of every matchup on the upcoming slate.
+
+    Entries are keyed by (team id, opponent id) and tagged with a version made of the
+    results version GameIngestor bumps whenever it writes games, plus the slate day.
+    A version change means new results or a new slate and the table is rebuilt; the
+    latest build is snapshotted to Mongo so a restarted worker serves it immediately.
+    """
+    COLLECTION = "matchup_table"
+    SLATE_DAYS = int(os.getenv("MATCHUP_SLATE_DAYS", "7"))
+    MAX_AGE = int(os.getenv("MATCHUP_TABLE_MAX_AGE", str(24 * 3600)))
+
+    def __init__(self):
+        self.version: Optional[str] = None
+        self.built_at = 0.0
+        self._entries: Dict[Tuple[int, int], BetAnalysis] = {}
+        self.stats = {"hits": 0, "misses": 0, "builds": 0, "snapshot_loads": 0, "errors": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, team_id: int, opponent_id: int) -> Optional[BetAnalysis]:
+        analysis = self._entries.get((team_id, opponent_id)) if self._is_fresh() else None
+        if analysis is None:
+            self.stats["misses"] += 1
+        else:
+            self.stats["hits"] += 1
+        return analysis
+
+    def is_current(self, version: str) -> bool:
+        return self.version == version and self._is_fresh()
+
+    def _is_fresh(self) -> bool:
+        return time.time() - self.built_at < self.MAX_AGE
+
+    def replace(self, version: str, entries: Dict[Tuple[int, int], BetAnalysis], built_at: Optional[float] = None):
+        # Swap the whole dict so concurrent lookups never see a half-built table
+        self._entries = entries
+        self.version = version
+        self.built_at = time.time() if built_at is None else built_at
+
+    @classmethod
+    def slate_version(cls, results_version: int) -> str:
+        return f"{results_version}:{datetime.utcnow().date().isoformat()}"
+
+    @classmethod
+    async def upcoming_matchups(cls, season: int) -> List[Tuple[int, int]]:
+        """(home, visitor) ids of unplayed games kicking off within the next SLATE_DAYS."""
+        now = datetime.utcnow()
+        # Games that kicked off in the last few hours may still be in progress
+        window = {"$gte": now - timedelta(hours=12), "$lt": now + timedelta(days=cls.SLATE_DAYS)}
+        cursor = Database.db.games.find(
+            {"season": season, "date": window, "home_team_score": None},
+            {"home_team_id": 1, "visitor_team_id": 1}
+        )
+        return list({(doc["home_team_id"], doc["visitor_team_id"]) async for doc in cursor})
+
+    async def save_snapshot(self):
+        try:
+            await Database.db[self.COLLECTION].replace_one({"_id": "current"}, {
+                "version": self.version,
+                "built_at": self.built_at,
+                "entries": [
+                    {"team_id": team_id, "opponent_id": opponent_id, "analysis": analysis.dict()}
+                    for (team_id, opponent_id), analysis in self._entries.items()
+                ],
+            }, upsert=True)
+        except Exception as e:
+            logger.warning("Error saving matchup table snapshot: %s", e)
+            self.stats["errors"] += 1
+
+    async def load_snapshot(self, version: str) -> bool:
+        """Serve the stored table if it was built for this version; False means rebuild."""
+        try:
+            doc = await Database.db[self.COLLECTION].find_one({"_id": "current"})
+        except Exception as e:
+            logger.warning("Error loading matchup table snapshot: %s", e)
+            self.stats["errors"] += 1
+            return False
+        if not doc or doc.get("version") != version or time.time() - doc["built_at"] >= self.MAX_AGE:
+            return False
+        self.replace(version, {
+            (entry["team_id"], entry["opponent_id"]): BetAnalysis(**entry["analysis"])
+            for entry in doc["entries"]
+        }, built_at=doc["built_at"])
+        self.stats["snapshot_loads"] += 1
+        return True
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "version": self.version,
+            "age_seconds": round(time.time() - self.built_at) if self.built_at else None,
+        }
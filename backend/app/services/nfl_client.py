@@ -1,14 +1,37 @@
-import httpx
-from typing import Dict
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
+import logging
 import os
+from .upstream import UpstreamScheduler
+from .cache import build_cache
+from .team_index import TeamIndex
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
 class NFLClient:
-    BASE_URL = 'https://api.balldontlie.io/nfl/v1/'
+    BASE_URL = os.getenv("NFL_API_BASE_URL", 'https://api.balldontlie.io/nfl/v1/')  # Overridable for local stand-ins
     API_KEY = os.getenv("NFL_API_KEY")  # Load API key from environment
+    CURRENT_SEASON = int(os.getenv("NFL_CURRENT_SEASON", "2024"))  # Recent form
+    LAST_SEASON = int(os.getenv("NFL_LAST_SEASON", str(CURRENT_SEASON - 1)))  # Head-to-head
+    BACKGROUND_MAX_WAIT = 60.0  # Seconds a background job may wait for a rate-limit slot
+    TEAMS_SNAPSHOT = os.getenv(
+        "NFL_TEAMS_SNAPSHOT",
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "teams.json")
+    )
+
+    # Seconds a response stays fresh, then how long it may still be served while refreshing.
+    # Last-season H2H results never change; recent form changes at most a few times a week.
+    CACHE_TTLS = {
+        "h2h": int(os.getenv("CACHE_TTL_H2H", str(7 * 24 * 3600))),
+        "last_5": int(os.getenv("CACHE_TTL_LAST_5", str(6 * 3600))),
+    }
+    CACHE_STALE_TTLS = {
+        "h2h": int(os.getenv("CACHE_STALE_TTL_H2H", str(30 * 24 * 3600))),
+        "last_5": int(os.getenv("CACHE_STALE_TTL_LAST_5", str(24 * 3600))),
+    }
 
     def __init__(self):
         if not self.API_KEY:
@@ -17,88 +40,115 @@ class NFLClient:
             "Authorization": self.API_KEY
         }
         self.teams = None 
+        self.team_index = TeamIndex([])
+        # A snapshot from a previous run lets us resolve teams without waiting on /teams
+        snapshot = TeamIndex.load_snapshot(self.TEAMS_SNAPSHOT)
+        if snapshot is not None:
+            self._set_teams(snapshot)
+        self.cache = build_cache(self.CACHE_TTLS, self.CACHE_STALE_TTLS)
+        self.upstream = UpstreamScheduler()
 
     async def get_teams(self):
         """Fetch and cache all teams."""
         if self.teams is not None:  # Return cached teams if available
             return self.teams
 
+        if not await self.refresh_teams():
+            # Leave self.teams unset so the next call retries once the API recovers
+            return []
+        return self.teams
+
+    async def refresh_teams(self) -> bool:
+        """Reload teams from the API, rebuild the name index and update the snapshot."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.BASE_URL}/teams", headers=self.headers)
-                if response.status_code == 200:
-                    self.teams = response.json().get("data", [])  # Cache team data
-                    return self.teams
+            response = await self.upstream.get(f"{self.BASE_URL}/teams", headers=self.headers)
+            if response.status_code == 200:
+                teams = response.json().get("data", [])
+                if teams:
+                    self._set_teams(TeamIndex(teams))
+                    self.team_index.save_snapshot(self.TEAMS_SNAPSHOT)
+                    return True
         except Exception as e:
-            print(f"Error getting teams: {e}")
+            logger.warning("Error getting teams: %s", e)
+        return False
 
-        self.teams = []  # Ensure self.teams is set to an empty list if fetching fails
-        return self.teams
+    def _set_teams(self, index: TeamIndex):
+        self.team_index = index
+        self.teams = index.teams
 
     async def get_team_id(self, team_name: str) -> int:
-        """Get team ID by matching the team name, location, or full name."""
+        """Get team ID by matching the team name, location, full name, abbreviation or alias."""
         try:
-            teams = await self.get_teams()  # Fetch teams
-            if not teams:
+            await self.get_teams()  # Fetch teams
+            if not self.team_index:
                 raise ValueError("Team list is empty. Unable to fetch team data.")
 
-            # Check against all possible name fields
-            for team in teams:
-                if (
-                    team_name.lower() == team["name"].lower() or
-                    team_name.lower() == team["location"].lower() or
-                    team_name.lower() in team["full_name"].lower()
-                ):
-                    return team["id"]
-
-            raise ValueError(f"Team '{team_name}' not found.")
+            team = self.team_index.lookup(team_name)
+            if team is None:
+                raise ValueError(f"Team '{team_name}' not found.")
+            return team["id"]
         except Exception as e:
-            print(f"Error fetching team ID for {team_name}: {e}")
+            logger.info("Error fetching team ID for %s: %s", team_name, e)
             raise
 
     async def get_h2h_last_season(self, team1_id: int, team2_id: int) -> Dict:
         """Get head-to-head games from the last season between two teams."""
         try:
-            last_season = 2023  # Replace with logic to dynamically fetch the last completed season
+            last_season = self.LAST_SEASON
+            # The query is symmetric, so order the pair to share one cache entry per matchup
+            team1_id, team2_id = sorted((team1_id, team2_id))
             params = {
                 "team_ids[]": [team1_id, team2_id],
                 "seasons[]": last_season,
                 "per_page": 100,  # To ensure we get all relevant games
             }
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.BASE_URL}/games",
-                    params=params,
-                    headers=self.headers
-                )
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    print(f"Error fetching H2H games: {response.status_code} - {response.text}")
-                    return {"data": []}
+            return await self.cache.get_or_fetch(
+                "h2h", f"{last_season}:{team1_id}:{team2_id}", lambda: self._fetch_games(params)
+            )
         except Exception as e:
-            print(f"Error in get_h2h_last_season: {e}")
-            return {"data": []}
+            logger.warning("Error in get_h2h_last_season: %s", e)
+            return {"data": [], "degraded": True}
 
-    async def get_last_5_games(self, team_id: str) -> Dict:
-        """Get team's last 5 games"""
+    async def get_last_5_games(self, team_id: int) -> Dict:
+        """Get the team's current-season games; the analyzer picks the newest five completed.
+
+        The API does not order by date or skip unplayed games, so the first five rows
+        are not the last five results.
+        """
         try:
-            async with httpx.AsyncClient() as client:
-                params = {
-                    "team_ids[]": team_id,
-                    "per_page": 5,
-                    "seasons[]": 2024
-                }
-                
-                response = await client.get(
-                    f"{self.BASE_URL}/games",
-                    params=params,
-                    headers=self.headers
-                )
-                
-                print(f"Games response status: {response.status_code}")
-                print(f"Games response body: {response.text}")
-                return response.json() if response.status_code == 200 else {"data": []}
+            params = {
+                "team_ids[]": team_id,
+                "per_page": 100,  # A whole regular season plus playoffs
+                "seasons[]": self.CURRENT_SEASON
+            }
+            return await self.cache.get_or_fetch(
+                "last_5", f"{self.CURRENT_SEASON}:{team_id}:season", lambda: self._fetch_games(params)
+            )
         except Exception as e:
-            print(f"Error getting games: {e}")
-            return {"data": []}
+            logger.warning("Error getting games: %s", e)
+            return {"data": [], "degraded": True}
+
+    async def get_season_games(self, season: int) -> List[Dict]:
+        """Page through every game of a season. Background use: waits for rate-limit slots."""
+        games = []
+        params = {"seasons[]": season, "per_page": 100}
+        while True:
+            page = await self._fetch_games(params, max_wait=self.BACKGROUND_MAX_WAIT)
+            games.extend(page.get("data", []))
+            next_cursor = page.get("meta", {}).get("next_cursor")
+            if not next_cursor:
+                return games
+            params = {**params, "cursor": next_cursor}
+
+    async def _fetch_games(self, params: Dict, max_wait: Optional[float] = None) -> Dict:
+        """Fetch /games from the API, raising on non-200 responses so failures are not cached."""
+        response = await self.upstream.get(
+            f"{self.BASE_URL}/games",
+            params=params,
+            headers=self.headers,
+            max_wait=max_wait
+        )
+        logger.debug("Games response status: %s", response.status_code)
+        if response.status_code != 200:
+            raise RuntimeError(f"Error fetching games: {response.status_code} - {response.text}")
+        return response.json()
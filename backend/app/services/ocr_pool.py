@@ -0,0 +1,118 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+import os
+
+
+class OCRPoolSaturated(Exception):
+    """Raised when the OCR queue is full and the job should be retried later."""
+
+
+class OCRPool:
+    """Process pool that keeps CPU-bound OCR off the event loop.
+
+    At most MAX_WORKERS jobs run at once and at most MAX_QUEUE more may wait for a
+    worker; anything beyond that is rejected with OCRPoolSaturated. A job that runs
+    longer than TIMEOUT raises asyncio.TimeoutError to the caller, but a running
+    process job cannot be interrupted, so its slot is only freed when the worker
+    actually finishes. Later jobs wait for a slot here, where MAX_QUEUE bounds them,
+    rather than inside the executor where the wait would eat into their own timeout.
+    """
+    MAX_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 2)))
+    MAX_QUEUE = int(os.getenv("OCR_MAX_QUEUE", str(MAX_WORKERS * 4)))
+    TIMEOUT = float(os.getenv("OCR_TIMEOUT", "20"))
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _slots: Optional[asyncio.Semaphore] = None
+    _queued = 0
+    _running = 0
+    stats = {
+        "jobs": 0,
+        "rejected": 0,
+        "timeouts": 0,
+        "errors": 0,
+        "ocr_seconds_total": 0.0,
+        "ocr_seconds_max": 0.0,
+    }
+
+    @classmethod
+    async def start(cls):
+        if cls._executor is None:
+            cls._executor = ProcessPoolExecutor(max_workers=cls.MAX_WORKERS)
+        if cls._slots is None:
+            cls._slots = asyncio.Semaphore(cls.MAX_WORKERS)
+
+    @classmethod
+    async def close(cls):
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
+        cls._slots = None
+
+    @classmethod
+    async def run(cls, func: Callable, *args) -> Any:
+        """Run func(*args) in a worker process, applying backpressure and the job timeout."""
+        await cls.start()
+        if cls._queued + cls._running >= cls.MAX_WORKERS + cls.MAX_QUEUE:
+            cls.stats["rejected"] += 1
+            raise OCRPoolSaturated("OCR queue is full, retry shortly")
+
+        slots = cls._slots
+        cls._queued += 1
+        try:
+            await slots.acquire()
+        finally:
+            cls._queued -= 1
+
+        cls._running += 1
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+
+        def release():
+            elapsed = time.perf_counter() - started
+            cls._running -= 1
+            slots.release()
+            cls.stats["jobs"] += 1
+            cls.stats["ocr_seconds_total"] += elapsed
+            cls.stats["ocr_seconds_max"] = max(cls.stats["ocr_seconds_max"], elapsed)
+
+        def on_done(_):
+            # Runs on the executor's thread once the process is really done with the job
+            try:
+                loop.call_soon_threadsafe(release)
+            except RuntimeError:
+                pass  # The loop closed during shutdown
+
+        try:
+            job = cls._executor.submit(func, *args)
+        except Exception:
+            release()
+            raise
+        job.add_done_callback(on_done)
+
+        try:
+            # shield keeps the timeout from cancelling the job, which could not stop it anyway
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job)), timeout=cls.TIMEOUT)
+        except asyncio.TimeoutError:
+            cls.stats["timeouts"] += 1
+            raise
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM on a huge image); start a fresh pool for the next job
+            cls.stats["errors"] += 1
+            cls._executor = None
+            raise
+        except Exception:
+            cls.stats["errors"] += 1
+            raise
+
+    @classmethod
+    def get_stats(cls) -> Dict:
+        return {
+            "workers": cls.MAX_WORKERS,
+            "max_queue": cls.MAX_QUEUE,
+            "queue_depth": cls._queued,
+            "running": cls._running,
+            **cls.stats,
+        }
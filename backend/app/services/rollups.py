@@ -0,0 +1,123 @@
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+from pymongo import UpdateOne
+from ..database import Database
+from .nfl_client import NFLClient
+from .team_index import normalize_team_name
+
+
+class Rollups:
+    """Per-wallet and per-team counters kept current with atomic $inc on every saved analysis.
+
+    Reading a wallet's or team's stats is a single _id lookup instead of an
+    aggregation over the analyses collection.
+    """
+    FAVORITE_TEAMS = 3
+
+    _nfl_client: Optional[NFLClient] = None
+
+    @classmethod
+    def configure(cls, nfl_client: NFLClient):
+        """Resolve team spellings through this client's team index when writing and reading."""
+        cls._nfl_client = nfl_client
+
+    @classmethod
+    def team_key(cls, name: str) -> str:
+        # "KC", "Chiefs" and "Kansas City Chiefs" share one bucket under the team's full name
+        team = cls._nfl_client.team_index.lookup(name) if cls._nfl_client is not None and name else None
+        return normalize_team_name(team["full_name"] if team else name or "") or "unknown"
+
+    @classmethod
+    async def apply(cls, analyses: List[dict]):
+        """Fold newly written analyses into the wallet_stats and team_stats documents."""
+        if not analyses:
+            return
+
+        wallet_updates: Dict[str, Dict] = defaultdict(lambda: {"inc": Counter(), "first": None, "last": None})
+        team_updates: Dict[str, Counter] = defaultdict(Counter)
+
+        # Combine the batch per wallet and team so each document gets one update
+        for analysis in analyses:
+            update = wallet_updates[analysis["wallet_address"]]
+            inc = update["inc"]
+            inc["analyses"] += 1
+            inc["overall_score_total"] += analysis["overall_score"]
+            inc["solana_suggestions"] += int(analysis["should_show_solana"])
+            timestamp = analysis["timestamp"]
+            update["first"] = min(update["first"] or timestamp, timestamp)
+            update["last"] = max(update["last"] or timestamp, timestamp)
+
+            for bet, leg in zip(analysis["bets"], analysis["individual_analyses"]):
+                if not leg.get("scored", True):
+                    # Totals and props are on the game; their "team" is just the away side
+                    continue
+                team = cls.team_key(bet["team"])
+                inc["legs"] += 1
+                inc[f"recommendations.{leg['recommendation']}"] += 1
+                inc[f"teams.{team}"] += 1
+
+                team_inc = team_updates[team]
+                team_inc["picks"] += 1
+                team_inc["confidence_total"] += leg["confidence_score"]
+                team_inc[f"recommendations.{leg['recommendation']}"] += 1
+
+        wallet_ops = [
+            UpdateOne(
+                {"_id": wallet},
+                {
+                    "$inc": dict(update["inc"]),
+                    "$min": {"first_analysis_at": update["first"]},
+                    "$max": {"last_analysis_at": update["last"]},
+                },
+                upsert=True
+            )
+            for wallet, update in wallet_updates.items()
+        ]
+        team_ops = [
+            UpdateOne({"_id": team}, {"$inc": dict(inc)}, upsert=True)
+            for team, inc in team_updates.items()
+        ]
+        # bulk_write rejects an empty list, e.g. when no analysis in the batch had legs
+        if wallet_ops:
+            await Database.db.wallet_stats.bulk_write(wallet_ops, ordered=False)
+        if team_ops:
+            await Database.db.team_stats.bulk_write(team_ops, ordered=False)
+
+    @classmethod
+    async def get_wallet_stats(cls, wallet_address: str) -> Optional[Dict]:
+        doc = await Database.db.wallet_stats.find_one({"_id": wallet_address})
+        if doc is None:
+            return None
+        analyses = doc.get("analyses", 0)
+        legs = doc.get("legs", 0)
+        recommendations = doc.get("recommendations", {})
+        teams = doc.get("teams", {})
+        return {
+            "wallet_address": wallet_address,
+            "analyses": analyses,
+            "legs": legs,
+            "average_overall_score": doc.get("overall_score_total", 0) / analyses if analyses else 0.0,
+            # Share of legs rated STRONG and of parlays confident enough not to suggest Solana
+            "strong_leg_rate": recommendations.get("STRONG", 0) / legs if legs else 0.0,
+            "confident_parlay_rate": 1 - doc.get("solana_suggestions", 0) / analyses if analyses else 0.0,
+            "recommendations": recommendations,
+            "favorite_teams": [
+                team for team, _ in Counter(teams).most_common(cls.FAVORITE_TEAMS)
+            ],
+            "first_analysis_at": doc.get("first_analysis_at"),
+            "last_analysis_at": doc.get("last_analysis_at"),
+        }
+
+    @classmethod
+    async def get_team_stats(cls, team: str) -> Optional[Dict]:
+        key = cls.team_key(team)
+        doc = await Database.db.team_stats.find_one({"_id": key})
+        if doc is None:
+            return None
+        picks = doc.get("picks", 0)
+        return {
+            "team": key,
+            "picks": picks,
+            "average_confidence": doc.get("confidence_total", 0) / picks if picks else 0.0,
+            "recommendations": doc.get("recommendations", {}),
+        }
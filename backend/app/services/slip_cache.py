@@ -0,0 +1,178 @@
+import asyncio
+import hashlib
+import io
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from PIL import Image, ImageChops
+import os
+from ..database import Database
+from .ocr_pool import OCRPool, OCRPoolSaturated
+
+logger = logging.getLogger(__name__)
+
+
+class SlipFingerprint:
+    """Exact and perceptual hashes of one uploaded bet slip image."""
+
+    def __init__(self, sha256: str, phash: Optional[int], thumbnail: Optional[bytes], sportsbook: str):
+        self.sha256 = sha256
+        self.phash = phash
+        self.thumbnail = thumbnail
+        self.sportsbook = sportsbook
+
+    @property
+    def key(self) -> str:
+        # The same screenshot may parse differently under another sportsbook profile
+        return f"{self.sportsbook}:{self.sha256}"
+
+    @property
+    def phash_bands(self) -> List[str]:
+        # Eight 32-bit bands: two hashes within 7 bits of each other always share one
+        if self.phash is None:
+            return []
+        return [f"{i}:{(self.phash >> (32 * i)) & 0xFFFFFFFF:08x}" for i in range(8)]
+
+
+class SlipCache:
+    """Parsed parlays keyed by screenshot hash, so re-uploads skip OCR entirely.
+
+    An exact (sha256) match is served directly. Otherwise the perceptual hash finds
+    visually similar slips, and a candidate is only served if its stored thumbnail is
+    pixel-for-pixel close: slips from one sportsbook share a layout, so the hash
+    alone cannot tell "-150" from "-160". Entries expire via a TTL index.
+    """
+    COLLECTION = "slip_cache"
+    TTL_SECONDS = int(os.getenv("SLIP_CACHE_TTL", str(7 * 24 * 3600)))
+    MAX_PHASH_DISTANCE = int(os.getenv("SLIP_CACHE_MAX_PHASH_DISTANCE", "4"))
+    HASH_SIZE = 16
+    # Re-encoded or rescaled copies of a slip differ in a handful of thumbnail pixels;
+    # changing a single odds digit differs in 20 or more
+    THUMBNAIL_WIDTH = 256
+    MAX_THUMBNAIL_DIFF_PIXELS = int(os.getenv("SLIP_CACHE_MAX_DIFF_PIXELS", "8"))
+
+    stats = {"exact_hits": 0, "perceptual_hits": 0, "misses": 0, "errors": 0}
+
+    @classmethod
+    def _collection(cls):
+        return Database.db[cls.COLLECTION]
+
+    @classmethod
+    async def ensure_indexes(cls):
+        await cls._collection().create_index("created_at", expireAfterSeconds=cls.TTL_SECONDS)
+        await cls._collection().create_index([("sportsbook", 1), ("phash_bands", 1)])
+
+    @classmethod
+    def fingerprint(cls, image_bytes: bytes, sportsbook: str) -> SlipFingerprint:
+        # Only the sha256; lookup adds the perceptual hash if the exact match misses
+        return SlipFingerprint(hashlib.sha256(image_bytes).hexdigest(), None, None, sportsbook)
+
+    @classmethod
+    async def _add_perceptual_fingerprint(cls, fingerprint: SlipFingerprint, image_bytes: bytes):
+        try:
+            # Decoding is CPU work on untrusted images; run it under the OCR pool's bound
+            fingerprint.phash, fingerprint.thumbnail = await OCRPool.run(
+                cls._perceptual_fingerprint, image_bytes
+            )
+        except OCRPoolSaturated:
+            raise
+        except Exception as e:
+            logger.warning("Error computing perceptual hash: %s", e)
+
+    @classmethod
+    def _perceptual_fingerprint(cls, image_bytes: bytes) -> Tuple[int, bytes]:
+        """Return a 256-bit dHash and a small grayscale PNG thumbnail of the image."""
+        image = Image.open(io.BytesIO(image_bytes))
+        image.draft("L", (cls.THUMBNAIL_WIDTH * 2, cls.THUMBNAIL_WIDTH * 8))
+        image = image.convert("L")
+
+        height = max(1, round(image.height * cls.THUMBNAIL_WIDTH / image.width))
+        thumbnail = image.resize((cls.THUMBNAIL_WIDTH, height), Image.BOX)
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, "PNG", optimize=True)
+
+        # dHash: one bit per horizontally adjacent pair, brighter-left or not
+        size = cls.HASH_SIZE
+        pixels = list(thumbnail.resize((size + 1, size), Image.LANCZOS).getdata())
+        value = 0
+        for row in range(size):
+            for col in range(size):
+                left = pixels[row * (size + 1) + col]
+                value = (value << 1) | (left > pixels[row * (size + 1) + col + 1])
+        return value, buffer.getvalue()
+
+    @classmethod
+    def _first_match(cls, candidates: List[Dict], fingerprint: SlipFingerprint) -> Optional[Dict]:
+        """The first candidate whose thumbnail matches; decodes PNGs, so call it off the loop."""
+        for doc in candidates:
+            if cls._thumbnails_match(doc["thumbnail"], fingerprint.thumbnail):
+                return doc
+        return None
+
+    @classmethod
+    def _thumbnails_match(cls, first: bytes, second: bytes) -> bool:
+        a = Image.open(io.BytesIO(first))
+        b = Image.open(io.BytesIO(second))
+        if abs(a.height - b.height) > max(2, a.height // 100):
+            return False
+        if a.size != b.size:
+            b = b.resize(a.size, Image.BOX)
+        histogram = ImageChops.difference(a, b).histogram()
+        return sum(histogram[48:]) <= cls.MAX_THUMBNAIL_DIFF_PIXELS
+
+    @classmethod
+    async def lookup(cls, fingerprint: SlipFingerprint, image_bytes: bytes) -> Tuple[Optional[Dict], str]:
+        """Return (parsed parlay, "exact" | "perceptual" | "miss") for a fingerprint.
+
+        On a miss the fingerprint has its perceptual hash and thumbnail filled in for store.
+        """
+        try:
+            doc = await cls._collection().find_one({"_id": fingerprint.key})
+            if doc is not None:
+                cls.stats["exact_hits"] += 1
+                return doc["parsed"], "exact"
+
+            await cls._add_perceptual_fingerprint(fingerprint, image_bytes)
+            if fingerprint.phash is not None:
+                cursor = cls._collection().find(
+                    {"sportsbook": fingerprint.sportsbook, "phash_bands": {"$in": fingerprint.phash_bands}},
+                    {"phash": 1, "thumbnail": 1, "parsed": 1},
+                ).limit(50)
+                candidates = [
+                    doc async for doc in cursor
+                    if bin(int(doc["phash"], 16) ^ fingerprint.phash).count("1") <= cls.MAX_PHASH_DISTANCE
+                ]
+                doc = await asyncio.to_thread(cls._first_match, candidates, fingerprint) if candidates else None
+                if doc is not None:
+                    cls.stats["perceptual_hits"] += 1
+                    return doc["parsed"], "perceptual"
+        except OCRPoolSaturated:
+            raise
+        except Exception as e:
+            logger.warning("Error reading slip cache: %s", e)
+            cls.stats["errors"] += 1
+
+        cls.stats["misses"] += 1
+        return None, "miss"
+
+    @classmethod
+    async def store(cls, fingerprint: SlipFingerprint, parsed: Dict):
+        # Only cache slips that produced a usable parlay so a bad OCR run can be retried
+        if parsed.get("total_odds") is None or not parsed.get("individual_bets"):
+            return
+        try:
+            await cls._collection().replace_one(
+                {"_id": fingerprint.key},
+                {
+                    "sportsbook": fingerprint.sportsbook,
+                    "phash": f"{fingerprint.phash:064x}" if fingerprint.phash is not None else None,
+                    "phash_bands": fingerprint.phash_bands,
+                    "thumbnail": fingerprint.thumbnail,
+                    "parsed": parsed,
+                    "created_at": datetime.utcnow(),
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning("Error writing slip cache: %s", e)
+            cls.stats["errors"] += 1
@@ -0,0 +1,270 @@
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+
+ODDS = r"[+-]\d{3,5}|EVEN"
+ODDS_TOKEN = re.compile(ODDS, re.I)
+HAS_DIGIT = re.compile(r"\d")
+MARKETS = ("moneyline", "spread", "total", "prop")
+
+# A pick's selection text is one of these; moneyline (a bare team name) is the fallback.
+# Spread lines are small numbers with an optional half point, odds have 3+ digits.
+SELECTION = re.compile(
+    r"^(?:"
+    r"(?P<total_side>over|under|o|u)\s*(?P<total_line>\d{1,3}(?:\.[05])?)"
+    r"|(?P<spread_team>[A-Za-z0-9.&' ]+?)\s+(?P<spread_line>[+-]\d{1,2}(?:\.[05])?|pk)"
+    r"|(?P<player>[A-Za-z.'\- ]+?)\s+"
+    r"(?:(?P<prop_side>over|under|o|u)\s*(?P<prop_line>\d+(?:\.5)?)|(?P<at_least>\d+)\+)"
+    r"\s*(?P<prop_market>[A-Za-z ]*)"
+    r"|(?P<team>.+)"
+    r")$",
+    re.I
+)
+
+
+@dataclass(frozen=True)
+class SlipGrammar:
+    """A sportsbook's slip layout: pick markers plus one compiled pattern for every other line."""
+    pick_markers: str
+    ignore: Pattern
+    line: Pattern
+
+
+def build_grammar(
+    pick_markers: str = "©®",
+    matchup_separators: Tuple[str, ...] = ("@", "at"),
+    total_labels: Tuple[str, ...] = (r"\d+\s*leg\s*parlay", "parlay", "total odds", "odds"),
+    ignore_prefixes: Tuple[str, ...] = ("payout", "wager", "to pay", "to win", "cash out", "bet placed", "share"),
+) -> SlipGrammar:
+    # Tesseract often drops the spaces around "@"; word separators need them to be words at all
+    words = "|".join(re.escape(separator) for separator in matchup_separators if separator != "@")
+    separator = r"\s*(?P<at>@)\s*" + (rf"|\s+(?P<separator>{words})\s+" if words else "")
+    # Alternatives are tried in order, so boilerplate like "Payout @ +596" never reads as a matchup
+    ignore = rf"(?:{'|'.join(ignore_prefixes)})\b"
+    return SlipGrammar(pick_markers=pick_markers, ignore=re.compile(ignore, re.I), line=re.compile(
+        r"^(?:"
+        rf"(?P<ignore>{ignore}.*)"
+        rf"|(?P<odds>{ODDS})"
+        rf"|(?:{'|'.join(total_labels)})\b\D*?(?P<total_odds>{ODDS})"
+        r"|(?P<moneyline>money\s*line)"
+        r"|(?P<spread>(?:point\s*)?spread(?:\s*betting)?|run line|puck line)"
+        r"|(?P<total>total(?:\s*points)?|over/under)"
+        r"|(?P<prop>player\s*props?)"
+        rf"|(?P<away>[A-Za-z0-9.&' ]+?)(?:{separator})(?P<home>[A-Za-z0-9.&' ]+?)"
+        r")$",
+        re.I
+    ))
+
+
+SLIP_GRAMMARS: Dict[str, SlipGrammar] = {
+    "default": build_grammar(),
+    # Matchups read "Chiefs at Bills" as often as "Chiefs @ Bills"; SGP legs say "Same Game Parlay"
+    "draftkings": build_grammar(
+        matchup_separators=("@", "at", "vs"),
+        total_labels=(r"\d+\s*leg\s*(?:sgp|parlay)", "same game parlay", "parlay", "odds"),
+    ),
+    # Odds sit on the selection line; "Total wager" and "Potential payout" frame the slip
+    "fanduel": build_grammar(
+        total_labels=(r"\d+\s*leg\s*parlay", "parlay", "odds"),
+        ignore_prefixes=("total wager", "potential payout", "payout", "wager", "to win", "cash out", "share"),
+    ),
+}
+
+
+@dataclass
+class ParsedSlip:
+    """Everything read off a slip: complete legs, legs missing a piece, and what went wrong."""
+    total_odds: Optional[int] = None
+    legs: List[Dict] = field(default_factory=list)
+    incomplete_legs: List[Dict] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def complete(self) -> bool:
+        return self.total_odds is not None and bool(self.legs) and not self.incomplete_legs
+
+    def to_dict(self) -> Dict:
+        # individual_bets and total_odds keep the ParlayBet shape the router and slip cache expect
+        return {
+            "total_odds": self.total_odds,
+            "individual_bets": self.legs,
+            "incomplete_legs": self.incomplete_legs,
+            "warnings": self.warnings,
+            "complete": self.complete,
+        }
+
+
+def parse_odds(value: str) -> int:
+    return 100 if value.upper() == "EVEN" else int(value)
+
+
+def parse_slip(
+    text: str, sportsbook: str = "default", is_team: Optional[Callable[[str], bool]] = None
+) -> ParsedSlip:
+    """Read a parlay from OCR text in one pass, at most one grammar match per line; never raises.
+
+    "Away @ Home" is always a matchup. "Away at Home" and "Away vs Home" are only read
+    as one when is_team accepts both sides, since slips also say "Kickoff at 8 PM".
+    """
+    grammar = SLIP_GRAMMARS.get(sportsbook, SLIP_GRAMMARS["default"])
+    pick_markers, line_pattern = grammar.pick_markers, grammar.line
+    slip = ParsedSlip()
+    leg: Optional[Dict] = None
+    market: Optional[str] = None
+    pending_matchup: Optional[Tuple[str, str]] = None
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if "  " in line:
+            line = " ".join(line.split())
+
+        if line[0] in pick_markers:
+            # The pick marker is the checkmark tesseract reads as ©; odds may share the line
+            selection, odds = line[1:].strip(), None
+            head, _, tail = selection.rpartition(" ")
+            if head and ODDS_TOKEN.fullmatch(tail):
+                selection, odds = head, parse_odds(tail)
+            if not selection:
+                continue
+            if leg is not None:
+                _finish_leg(leg, slip)
+            leg = {"selection": selection, "odds": odds, "market": market, "matchup": pending_matchup}
+            market, pending_matchup = None, None
+            continue
+
+        # Plain odds and "Away @ Home" lines are most of a slip and need no grammar match
+        odds = away = home = None
+        if line[0] in "+-" and 4 <= len(line) <= 6 and line[1:].isdigit():
+            odds = int(line)
+        elif "@" in line and not grammar.ignore.match(line):
+            away, _, home = line.partition("@")
+            away, home = away.strip(), home.strip()
+            if not away or not home:
+                continue
+        else:
+            match = line_pattern.match(line)
+            if match is None or match["ignore"] is not None:
+                continue
+            if match["odds"] is not None:
+                odds = parse_odds(match["odds"])
+            elif match["total_odds"] is not None:
+                if slip.total_odds is None:
+                    slip.total_odds = parse_odds(match["total_odds"])
+                continue
+            elif match["away"] is not None:
+                if match["separator"] is not None and not (
+                    is_team is not None and is_team(match["away"]) and is_team(match["home"])
+                ):
+                    continue
+                away, home = match["away"], match["home"]
+            else:
+                market = next(name for name in MARKETS if match[name] is not None)
+                continue
+
+        if odds is not None:
+            if slip.total_odds is None and leg is None:
+                slip.total_odds = odds
+            elif leg is not None and leg["odds"] is None:
+                leg["odds"] = odds
+            elif slip.total_odds is None:
+                # Layouts that print the parlay odds below the legs
+                slip.total_odds = odds
+            else:
+                slip.warnings.append(f"Ignored unexpected odds line: {line}")
+        elif leg is not None and leg["matchup"] is None:
+            leg["matchup"] = (away, home)
+        else:
+            # Some layouts list the matchup above the selection
+            pending_matchup = (away, home)
+
+    if leg is not None:
+        _finish_leg(leg, slip)
+    if slip.total_odds is None:
+        slip.warnings.append("Parlay odds not found")
+    if not slip.legs and not slip.incomplete_legs:
+        slip.warnings.append("No legs found")
+    return slip
+
+
+def _finish_leg(leg: Dict, slip: ParsedSlip):
+    """Classify a leg's selection and add it to the slip as complete or incomplete."""
+    selection, matchup = leg["selection"], leg["matchup"]
+    confidence = 1.0
+    details: Dict = {}
+
+    # Bare team names (the common case) need no pattern at all
+    match = SELECTION.match(selection) if HAS_DIGIT.search(selection) else None
+    if match is None or match["team"] is not None:
+        bet_type, team = "moneyline", selection
+        if leg["market"] not in (None, "moneyline"):
+            # The slip labelled a line market but OCR lost the number
+            confidence *= 0.6
+            slip.warnings.append(f"No {leg['market']} line read for '{selection}'; treated as moneyline")
+    elif match["total_side"] is not None:
+        bet_type, team = "total", None
+        details = {"side": _side(match["total_side"]), "line": float(match["total_line"])}
+    elif match["spread_team"] is not None:
+        bet_type, team = "spread", match["spread_team"]
+        line = match["spread_line"]
+        details = {"line": 0.0 if line.lower() == "pk" else float(line)}
+    elif match["player"] is not None:
+        bet_type, team = "prop", None
+        details = {
+            "player": match["player"],
+            "market": match["prop_market"].strip().lower() or None,
+            "side": _side(match["prop_side"]) if match["prop_side"] else "over",
+            "line": float(match["prop_line"]) if match["prop_line"] else float(match["at_least"]) - 0.5,
+        }
+        # The slip does not say which side the player is on
+        confidence *= 0.7
+
+    opponent = None
+    if matchup is not None:
+        away, home = matchup
+        if team is None:
+            # Totals and props are on the game, so the leg just records both teams;
+            # BetAnalyzer scores them as neutral rather than as a moneyline on either side
+            team, opponent = away, home
+        else:
+            side = _match_side(team, away, home)
+            if side == "home":
+                opponent = away
+            elif side == "away":
+                opponent = home
+            else:
+                # Fall back to the original pairing: anything that is not the home team faces it
+                opponent = home
+                confidence *= 0.5
+                slip.warnings.append(f"Pick '{team}' is not in matchup '{away} @ {home}'")
+            if side is not None and team.lower() not in (away.lower(), home.lower()):
+                confidence *= 0.8
+
+    parsed = {
+        "team": team,
+        "opponent": opponent,
+        "bet_type": bet_type,
+        "odds": leg["odds"],
+        "details": {**details, "confidence": round(confidence, 2)},
+    }
+    missing = [name for name in ("team", "opponent", "odds") if parsed[name] is None]
+    if missing:
+        parsed["missing"] = missing
+        slip.incomplete_legs.append(parsed)
+        slip.warnings.append(f"Leg '{selection}' is missing {', '.join(missing)}")
+    else:
+        slip.legs.append(parsed)
+
+
+def _side(value: str) -> str:
+    return "over" if value[0] in "oO" else "under"
+
+
+def _match_side(team: str, away: str, home: str) -> Optional[str]:
+    """Which side of the matchup a pick names, allowing "Kansas City Chiefs" vs "Chiefs"."""
+    team = team.lower()
+    for side, name in (("home", home.lower()), ("away", away.lower())):
+        if team == name or team in name or name in team:
+            return side
+    return None
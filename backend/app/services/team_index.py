@@ -0,0 +1,137 @@
+import difflib
+import json
+import logging
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import os
+
+logger = logging.getLogger(__name__)
+
+# Nicknames, short forms and common OCR misreads, keyed by the team's `name` field
+TEAM_ALIASES = {
+    "Cardinals": ["arz", "az cardinals", "cards"],
+    "Falcons": ["atl falcons"],
+    "Ravens": ["bal ravens"],
+    "Bills": ["buf bills"],
+    "Panthers": ["car panthers"],
+    "Bears": ["chi bears"],
+    "Bengals": ["cin bengals", "bengais"],
+    "Browns": ["cle browns"],
+    "Cowboys": ["dal cowboys", "boys"],
+    "Broncos": ["den broncos"],
+    "Lions": ["det lions"],
+    "Packers": ["gb packers", "gnb", "pack"],
+    "Texans": ["hou texans"],
+    "Colts": ["ind colts"],
+    "Jaguars": ["jac", "jags", "jax jaguars"],
+    "Chiefs": ["kc", "kc chiefs", "kansas city chiefs"],
+    "Raiders": ["lv raiders", "oak", "oakland raiders"],
+    "Chargers": ["la chargers", "lac chargers", "bolts"],
+    "Rams": ["la rams", "lar rams"],
+    "Dolphins": ["mia dolphins", "fins", "phins"],
+    "Vikings": ["min vikings", "vikes"],
+    "Patriots": ["ne patriots", "pats"],
+    "Saints": ["no saints", "nola"],
+    "Giants": ["ny giants", "nyg giants", "gmen"],
+    "Jets": ["ny jets", "nyj jets"],
+    "Eagles": ["phi eagles", "phl", "birds"],
+    "Steelers": ["pit steelers"],
+    "49ers": ["sf", "sf 49ers", "niners", "san francisco", "a9ers", "49ors", "4gers"],
+    "Seahawks": ["sea seahawks", "hawks"],
+    "Buccaneers": ["tb bucs", "bucs", "buccs", "tampa"],
+    "Titans": ["ten titans"],
+    "Commanders": ["was", "wsh", "wsh commanders", "washington"],
+}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_team_name(name: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so OCR noise compares equal."""
+    return _SPACES.sub(" ", _NON_ALNUM.sub(" ", name.lower())).strip()
+
+
+class TeamIndex:
+    """Lookup table from every known team spelling to its team dict.
+
+    Built once per team list so resolving a name is a dict lookup; only unknown
+    spellings fall back to substring and fuzzy matching.
+    """
+    FUZZY_CUTOFF = 0.8
+    # OCR input is unbounded, so remembered misspellings are an LRU apart from the built index
+    FUZZY_MEMO_SIZE = int(os.getenv("TEAM_FUZZY_MEMO_SIZE", "1024"))
+
+    def __init__(self, teams: List[Dict]):
+        self.teams = teams
+        self._by_key: Dict[str, Dict] = {}
+
+        for team in teams:
+            for field in ("name", "location", "full_name", "abbreviation"):
+                value = team.get(field)
+                if value:
+                    # First team wins on shared keys (e.g. "New York"), as the old linear scan did
+                    self._by_key.setdefault(normalize_team_name(value), team)
+
+        for team_name, aliases in TEAM_ALIASES.items():
+            team = self._by_key.get(normalize_team_name(team_name))
+            if team is None:
+                continue
+            for alias in aliases:
+                self._by_key.setdefault(normalize_team_name(alias), team)
+
+        self._keys = list(self._by_key)
+        self._fuzzy: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def __bool__(self) -> bool:
+        return bool(self.teams)
+
+    def lookup(self, team_name: str) -> Optional[Dict]:
+        """Return the team matching team_name, or None if nothing is close enough."""
+        key = normalize_team_name(team_name)
+        if not key:
+            return None
+
+        team = self._by_key.get(key)
+        if team is not None:
+            return team
+        team = self._fuzzy.get(key)
+        if team is not None:
+            self._fuzzy.move_to_end(key)
+            return team
+
+        for team in self.teams:
+            if key in normalize_team_name(team["full_name"]):
+                return team
+
+        matches = difflib.get_close_matches(key, self._keys, n=1, cutoff=self.FUZZY_CUTOFF)
+        if matches:
+            team = self._by_key[matches[0]]
+            # Remember the misspelling so the next lookup skips difflib
+            self._fuzzy[key] = team
+            if len(self._fuzzy) > self.FUZZY_MEMO_SIZE:
+                self._fuzzy.popitem(last=False)
+            return team
+        return None
+
+    @classmethod
+    def load_snapshot(cls, path: str) -> Optional["TeamIndex"]:
+        """Build an index from a JSON team snapshot, or return None if there is none."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                teams = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Error loading team snapshot %s: %s", path, e)
+            return None
+        return cls(teams) if teams else None
+
+    def save_snapshot(self, path: str):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(self.teams, f, indent=2)
+        except OSError as e:
+            logger.warning("Error saving team snapshot %s: %s", path, e)
@@ -0,0 +1,218 @@
+import asyncio
+import functools
+import logging
+import random
+import time
+from typing import Dict, Optional
+import httpx
+import os
+from .http_client import HTTPClient
+from ..metrics import UPSTREAM_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Requests per minute for each balldontlie API tier
+API_TIER_LIMITS = {"free": 5, "all-star": 60, "goat": 600}
+
+
+class UpstreamUnavailable(Exception):
+    """The stats API is rate limited, failing or behind an open circuit; use cached or fallback data."""
+
+
+class TokenBucket:
+    """Spaces requests to the API tier's rate, allowing short bursts up to capacity."""
+
+    def __init__(self, rate_per_minute: float, capacity: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, max_wait: float):
+        """Take a token, waiting at most max_wait seconds for one; raises UpstreamUnavailable otherwise."""
+        self._refill()
+        # Reserve the token now so concurrent callers queue behind each other
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > max_wait:
+            self.tokens += 1
+            raise UpstreamUnavailable(f"Rate limit reached; next slot in {wait:.1f}s")
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and fails fast until a single probe succeeds."""
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            # Let exactly one request through to test whether the API has recovered
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+        return self.state == self.CLOSED
+
+    def release_probe(self):
+        # Give back a half-open probe slot that was never used
+        self._probing = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """Caps retries to a fraction of recent requests so retries cannot amplify an outage."""
+
+    def __init__(self, ratio: float, min_reserve: float, max_tokens: float = 20.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = min_reserve
+
+    def record_request(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class UpstreamScheduler:
+    """Rate-limit, retry and circuit-breaker policy for one upstream API.
+
+    Identical concurrent requests are still coalesced by HTTPClient, so the whole
+    policy (including retries) runs once per unique in-flight request.
+    """
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self):
+        tier = os.getenv("NFL_API_TIER", "all-star").lower()
+        rate = float(os.getenv("NFL_API_RATE_PER_MINUTE", str(API_TIER_LIMITS.get(tier, 60))))
+        self.bucket = TokenBucket(rate, capacity=float(os.getenv("NFL_API_BURST", str(max(1, rate / 10)))))
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("UPSTREAM_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("UPSTREAM_RESET_TIMEOUT", "30")),
+        )
+        self.budget = RetryBudget(
+            ratio=float(os.getenv("UPSTREAM_RETRY_RATIO", "0.1")),
+            min_reserve=float(os.getenv("UPSTREAM_RETRY_RESERVE", "3")),
+        )
+        self.max_retries = int(os.getenv("UPSTREAM_MAX_RETRIES", "2"))
+        self.attempt_timeout = float(os.getenv("UPSTREAM_ATTEMPT_TIMEOUT", "3"))
+        self.max_queue_wait = float(os.getenv("UPSTREAM_MAX_QUEUE_WAIT", "2"))
+        self.base_backoff = float(os.getenv("UPSTREAM_BACKOFF", "0.2"))
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "rejected": 0}
+
+    async def get(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        max_wait: Optional[float] = None
+    ) -> httpx.Response:
+        """GET through the policy. max_wait lets background jobs wait longer for a rate-limit slot."""
+        send = functools.partial(self._send_with_policy, max_wait=max_wait or self.max_queue_wait)
+        return await HTTPClient.get(url, params=params, headers=headers, send=send)
+
+    async def _send_with_policy(
+        self, url: str, params: Optional[Dict], headers: Optional[Dict], max_wait: float
+    ) -> httpx.Response:
+        self.stats["requests"] += 1
+        self.budget.record_request()
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.stats["rejected"] += 1
+                raise UpstreamUnavailable("Stats API circuit is open")
+            try:
+                await self.bucket.acquire(max_wait)
+            except UpstreamUnavailable:
+                self.stats["rejected"] += 1
+                self.breaker.release_probe()
+                raise
+
+            retry_after = None
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                response = await asyncio.wait_for(
+                    HTTPClient.send(url, params, headers), timeout=self.attempt_timeout
+                )
+                outcome = str(response.status_code)
+                if response.status_code not in self.RETRYABLE_STATUS:
+                    self.breaker.record_success()
+                    return response
+                error = f"HTTP {response.status_code}"
+                retry_after = response.headers.get("Retry-After")
+            except asyncio.TimeoutError as e:
+                outcome = "timeout"
+                error = f"{type(e).__name__}: {e}"
+            except httpx.HTTPError as e:
+                error = f"{type(e).__name__}: {e}"
+            except BaseException:
+                # Not an upstream failure (bad URL, closed client, cancellation), so it is not
+                # retried or counted against the API, but a half-open probe slot must be freed
+                self.breaker.release_probe()
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                UPSTREAM_SECONDS.observe(elapsed, endpoint=self._endpoint(url), outcome=outcome)
+                logger.debug("upstream=%s outcome=%s duration_ms=%.2f", url, outcome, elapsed * 1000)
+
+            self.stats["failures"] += 1
+            logger.info("Stats API attempt %d failed: %s", attempt + 1, error)
+            self.breaker.record_failure()
+            if attempt >= self.max_retries or not self.budget.try_spend():
+                raise UpstreamUnavailable(f"Stats API request failed: {error}")
+
+            attempt += 1
+            self.stats["retries"] += 1
+            # Full jitter, but honour a short Retry-After from a 429
+            delay = random.uniform(0, self.base_backoff * 2 ** attempt)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            if delay > max_wait:
+                raise UpstreamUnavailable(f"Stats API asked us to back off {delay:.1f}s: {error}")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _endpoint(url: str) -> str:
+        # Label by resource (teams, games) so metric cardinality stays bounded
+        return url.rstrip("/").rsplit("/", 1)[-1]
+
+    def get_stats(self) -> Dict:
+        return {
+            "circuit": self.breaker.state,
+            "circuit_open": self.breaker.state != CircuitBreaker.CLOSED,
+            "consecutive_failures": self.breaker.failures,
+            "rate_tokens": round(self.bucket.tokens, 2),
+            "retry_budget": round(self.budget.tokens, 2),
+            **self.stats,
+        }
@@ -0,0 +1,163 @@
+"""Local stand-in for the balldontlie NFL `/teams` and `/games` endpoints.
+
+Serves a deterministic synthetic league so benchmark runs are repeatable, with
+configurable latency and error rate to mimic a slow or flaky upstream. Run it
+standalone with:
+
+    uvicorn benchmarks.fake_stats_api:app --port 8100
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import os
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+# (location, name, abbreviation, conference, division); ids are the list position + 1
+TEAMS = [
+    ("Arizona", "Cardinals", "ARI", "NFC", "WEST"),
+    ("Atlanta", "Falcons", "ATL", "NFC", "SOUTH"),
+    ("Baltimore", "Ravens", "BAL", "AFC", "NORTH"),
+    ("Buffalo", "Bills", "BUF", "AFC", "EAST"),
+    ("Carolina", "Panthers", "CAR", "NFC", "SOUTH"),
+    ("Chicago", "Bears", "CHI", "NFC", "NORTH"),
+    ("Cincinnati", "Bengals", "CIN", "AFC", "NORTH"),
+    ("Cleveland", "Browns", "CLE", "AFC", "NORTH"),
+    ("Dallas", "Cowboys", "DAL", "NFC", "EAST"),
+    ("Denver", "Broncos", "DEN", "AFC", "WEST"),
+    ("Detroit", "Lions", "DET", "NFC", "NORTH"),
+    ("Green Bay", "Packers", "GB", "NFC", "NORTH"),
+    ("Houston", "Texans", "HOU", "AFC", "SOUTH"),
+    ("Indianapolis", "Colts", "IND", "AFC", "SOUTH"),
+    ("Jacksonville", "Jaguars", "JAX", "AFC", "SOUTH"),
+    ("Kansas City", "Chiefs", "KC", "AFC", "WEST"),
+    ("Las Vegas", "Raiders", "LV", "AFC", "WEST"),
+    ("Los Angeles", "Chargers", "LAC", "AFC", "WEST"),
+    ("Los Angeles", "Rams", "LAR", "NFC", "WEST"),
+    ("Miami", "Dolphins", "MIA", "AFC", "EAST"),
+    ("Minnesota", "Vikings", "MIN", "NFC", "NORTH"),
+    ("New England", "Patriots", "NE", "AFC", "EAST"),
+    ("New Orleans", "Saints", "NO", "NFC", "SOUTH"),
+    ("New York", "Giants", "NYG", "NFC", "EAST"),
+    ("New York", "Jets", "NYJ", "AFC", "EAST"),
+    ("Philadelphia", "Eagles", "PHI", "NFC", "EAST"),
+    ("Pittsburgh", "Steelers", "PIT", "AFC", "NORTH"),
+    ("San Francisco", "49ers", "SF", "NFC", "WEST"),
+    ("Seattle", "Seahawks", "SEA", "NFC", "WEST"),
+    ("Tampa Bay", "Buccaneers", "TB", "NFC", "SOUTH"),
+    ("Tennessee", "Titans", "TEN", "AFC", "SOUTH"),
+    ("Washington", "Commanders", "WAS", "NFC", "EAST"),
+]
+
+REGULAR_SEASON_WEEKS = 17
+
+
+def build_teams() -> List[Dict]:
+    return [
+        {
+            "id": i + 1,
+            "conference": conference,
+            "division": division,
+            "location": location,
+            "name": name,
+            "full_name": f"{location} {name}",
+            "abbreviation": abbreviation,
+        }
+        for i, (location, name, abbreviation, conference, division) in enumerate(TEAMS)
+    ]
+
+
+def build_games(seasons: List[int], current_season: int, completed_weeks: int, seed: int = 0) -> List[Dict]:
+    """A full regular season per season; in the current season only the first weeks have scores."""
+    rng = random.Random(seed)
+    teams = build_teams()
+    games = []
+    for season in sorted(seasons):
+        kickoff = datetime(season, 9, 8, 17)
+        for week in range(1, REGULAR_SEASON_WEEKS + 1):
+            order = list(teams)
+            rng.shuffle(order)
+            finished = season < current_season or week <= completed_weeks
+            for home, visitor in zip(order[::2], order[1::2]):
+                home_score = rng.randint(3, 42) if finished else None
+                visitor_score = rng.randint(3, 42) if finished else None
+                if finished and home_score == visitor_score:
+                    home_score += 3
+                games.append({
+                    "id": len(games) + 1,
+                    "season": season,
+                    "week": week,
+                    "postseason": False,
+                    "status": "Final" if finished else "Scheduled",
+                    "date": (kickoff + timedelta(weeks=week - 1)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                    "home_team": home,
+                    "visitor_team": visitor,
+                    "home_team_score": home_score,
+                    "visitor_team_score": visitor_score,
+                })
+    return games
+
+
+def create_app(
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    seasons: Optional[List[int]] = None,
+    current_season: int = 2024,
+    completed_weeks: int = 10,
+    seed: int = 0
+) -> FastAPI:
+    """Build the fake API. latency and jitter are seconds; error_rate is the share of 503s."""
+    seasons = seasons or [current_season - 1, current_season]
+    teams = build_teams()
+    games = build_games(seasons, current_season, completed_weeks, seed)
+    rng = random.Random(seed)
+    api = FastAPI()
+    api.state.requests = 0
+
+    async def simulate_upstream() -> Optional[JSONResponse]:
+        api.state.requests += 1
+        delay = latency + (rng.uniform(-jitter, jitter) if jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if error_rate and rng.random() < error_rate:
+            return JSONResponse({"error": "Service Unavailable"}, status_code=503)
+        return None
+
+    @api.get("/nfl/v1/teams")
+    async def list_teams():
+        return await simulate_upstream() or {"data": teams}
+
+    @api.get("/nfl/v1/games")
+    async def list_games(
+        team_ids: List[int] = Query([], alias="team_ids[]"),
+        seasons_filter: List[int] = Query([], alias="seasons[]"),
+        per_page: int = 25,
+        cursor: int = 0
+    ):
+        error = await simulate_upstream()
+        if error is not None:
+            return error
+        wanted_teams = set(team_ids)
+        wanted_seasons = set(seasons_filter)
+        matches = [
+            game for game in games
+            if game["id"] > cursor
+            and (not wanted_seasons or game["season"] in wanted_seasons)
+            and (not wanted_teams or {game["home_team"]["id"], game["visitor_team"]["id"]} & wanted_teams)
+        ]
+        page = matches[:min(per_page, 100)]
+        meta = {"per_page": per_page}
+        if len(matches) > len(page):
+            meta["next_cursor"] = page[-1]["id"]
+        return {"data": page, "meta": meta}
+
+    return api
+
+
+app = create_app(
+    latency=float(os.getenv("FAKE_API_LATENCY", "0.05")),
+    jitter=float(os.getenv("FAKE_API_JITTER", "0.02")),
+    error_rate=float(os.getenv("FAKE_API_ERROR_RATE", "0.0")),
+)
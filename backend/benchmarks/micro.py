@@ -0,0 +1,84 @@
+"""Microbenchmarks for the hot pure-Python helpers on the request path."""
+import asyncio
+import itertools
+import statistics
+import time
+import timeit
+from typing import Callable, Dict, List
+from app.services.analyzer import BetAnalyzer
+from app.services.image_processor import ImageProcessor
+from app.services.team_index import TeamIndex
+from .fake_stats_api import build_games, build_teams
+
+# Tesseract output for a three-leg slip, including the noise lines real screenshots produce
+SAMPLE_SLIP_TEXT = """3 Leg Parlay
++596
+SGP Boost available
+
+© Chiefs
+Bills @ Chiefs
+-150
+
+© Eagles
+Eagles @ Cowboys
++120
+
+© 49ers
+49ers @ Seahawks
+-135
+
+Wager $10.00 To Pay $69.60
+Payout @ +596
+"""
+
+# Exact names, abbreviations, aliases, a city shared by two teams and an OCR misread
+TEAM_LOOKUPS = ["Chiefs", "KC", "Kansas City Chiefs", "kc chiefs", "Philadelphia", "Eagels", "49ers", "Jags"]
+
+
+def _summarize(samples: List[float], per_call: int) -> Dict:
+    per_op = [sample / per_call * 1e6 for sample in samples]
+    return {
+        "median_us": round(statistics.median(per_op), 3),
+        "min_us": round(min(per_op), 3),
+        "ops_per_sec": round(1e6 / statistics.median(per_op)),
+    }
+
+
+def bench(func: Callable, repeat: int = 7) -> Dict:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return _summarize(timer.repeat(repeat=repeat, number=number), number)
+
+
+def bench_async(func: Callable, number: int = 2000, repeat: int = 7) -> Dict:
+    async def run() -> List[float]:
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                await func()
+            samples.append(time.perf_counter() - started)
+        return samples
+
+    return _summarize(asyncio.run(run()), number)
+
+
+def run_micro() -> Dict[str, Dict]:
+    analyzer = BetAnalyzer()
+    client = analyzer.nfl_client
+    # Preload teams so get_team_id measures the lookup, not the /teams fetch
+    client._set_teams(TeamIndex(build_teams()))
+
+    lookups = itertools.cycle(TEAM_LOOKUPS)
+    team_games = {
+        "data": [
+            game for game in build_games([2024], 2024, completed_weeks=17)
+            if 16 in (game["home_team"]["id"], game["visitor_team"]["id"])
+        ]
+    }
+
+    return {
+        "parse_bet_text": bench(lambda: ImageProcessor._parse_bet_text(SAMPLE_SLIP_TEXT)),
+        "get_team_id": bench_async(lambda: client.get_team_id(next(lookups))),
+        "calculate_win_percentage": bench(lambda: analyzer.calculate_win_percentage(team_games, 16)),
+    }
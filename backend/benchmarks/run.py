@@ -0,0 +1,255 @@
+"""Throughput and latency benchmark for the Parlay Pulse API.
+
+Runs the real FastAPI app in-process against a local fake of the stats API
+(benchmarks.fake_stats_api) and an in-memory MongoDB (mongomock-motor), drives
+/analyze and /analyze-image at a fixed concurrency, and reports req/s and
+p50/p95/p99 latency plus the microbenchmarks in benchmarks.micro. From backend/:
+
+    python -m benchmarks.run --requests 500 --concurrency 20
+    python -m benchmarks.run --json results.json
+    python -m benchmarks.run --baseline results.json --tolerance 0.2
+
+With --baseline the run exits non-zero if any p95/p99, median or req/s figure
+is worse than the baseline by more than the tolerance. Needs mongomock-motor on
+top of the app's own dependencies; /analyze-image is skipped without tesseract.
+"""
+import argparse
+import asyncio
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Optional
+import os
+
+FAKE_API_BASE_URL = "http://stats.local/nfl/v1"
+
+
+def configure_environment(scenario: str):
+    """Point the app at the local stand-ins; must run before anything imports app."""
+    # A benchmark must not overwrite the real team snapshot or hit the live API
+    os.environ["NFL_API_BASE_URL"] = FAKE_API_BASE_URL
+    os.environ["NFL_TEAMS_SNAPSHOT"] = os.path.join(tempfile.mkdtemp(prefix="parlay-bench-"), "teams.json")
+    os.environ.setdefault("NFL_API_KEY", "benchmark")
+    os.environ.setdefault("NFL_CURRENT_SEASON", "2024")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("CACHE_BACKEND", "memory")
+    # Measure the app, not the production rate limit; set these explicitly to test throttling
+    os.environ.setdefault("NFL_API_RATE_PER_MINUTE", "1000000")
+    os.environ.setdefault("NFL_API_BURST", "1000000")
+    if scenario == "api":
+        # Never score from the game table, so every leg goes through the stats cache and API
+        os.environ["GAME_TABLE_MAX_AGE"] = "0"
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+async def drive(
+    send: Callable[[int], Awaitable], total: int, concurrency: int, warmup: int = 0
+) -> Dict:
+    """Issue total requests from concurrency workers; send(i) returns an httpx response."""
+    for i in range(warmup):
+        await send(i)
+
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    headers: Counter = Counter()
+    next_index = iter(range(total))
+
+    async def worker():
+        for i in next_index:
+            started = time.perf_counter()
+            response = await send(warmup + i)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+            if "x-slip-cache" in response.headers:
+                headers[response.headers["x-slip-cache"]] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        "requests": total,
+        "seconds": round(elapsed, 3),
+        "rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+    if headers:
+        result["slip_cache"] = dict(headers)
+    return result
+
+
+async def run_load(args) -> Dict[str, Dict]:
+    import httpx
+    from mongomock_motor import AsyncMongoMockClient
+    from app.main import app
+    from app.database import Database
+    from app.routers import bets
+    from app.services.http_client import HTTPClient
+    from app.services.ingestion import GameIngestor
+    from .fake_stats_api import create_app
+    from .slips import build_corpus, random_parlay
+
+    fake_api = create_app(
+        latency=args.api_latency_ms / 1000,
+        jitter=args.api_jitter_ms / 1000,
+        error_rate=args.api_error_rate,
+        current_season=bets.analyzer.nfl_client.CURRENT_SEASON,
+        seed=args.seed
+    )
+
+    async def connect_memory_db():
+        Database.client = AsyncMongoMockClient()
+        Database.db = Database.client.parlay_pulse
+
+    # The app's own startup runs unchanged apart from where Mongo and the stats API live
+    Database.connect_db = connect_memory_db
+    HTTPClient.client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=fake_api), timeout=HTTPClient.TIMEOUT
+    )
+    await app.router.startup()
+
+    try:
+        # Wait for the first ingestion run so it does not compete with the measured requests
+        deadline = time.monotonic() + 120
+        while GameIngestor.stats["runs"] + GameIngestor.stats["errors"] == 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if args.scenario == "table":
+            while not bets.analyzer._is_table_warm() and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+
+        rng = random.Random(args.seed)
+        parlays = [random_parlay(rng, args.legs) for _ in range(256)]
+        results = {}
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://parlay.local", timeout=60
+        ) as client:
+            if "analyze" in args.only:
+                async def analyze(i: int):
+                    return await client.post("/api/v1/bets/analyze", json={
+                        "parlay": parlays[i % len(parlays)],
+                        "wallet_address": f"bench-wallet-{i % 50}",
+                    })
+
+                results["analyze"] = await drive(analyze, args.requests, args.concurrency, args.warmup)
+
+            if "analyze-image" in args.only:
+                if shutil.which("tesseract") is None:
+                    print("tesseract not found; skipping /analyze-image", file=sys.stderr)
+                else:
+                    corpus = build_corpus(args.images, args.legs, args.seed)
+
+                    async def analyze_image(i: int):
+                        image, _ = corpus[i % len(corpus)]
+                        return await client.post(
+                            "/api/v1/bets/analyze-image",
+                            files={"image": (f"slip_{i % len(corpus)}.png", image, "image/png")},
+                            data={"wallet_address": f"bench-wallet-{i % 50}", "sportsbook": "default"},
+                        )
+
+                    results["analyze-image"] = await drive(
+                        analyze_image, args.image_requests, args.concurrency, warmup=0
+                    )
+        results["upstream_requests"] = fake_api.state.requests
+    finally:
+        await app.router.shutdown()
+    return results
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Figures that regressed by more than tolerance (a fraction) against the baseline."""
+    regressions = []
+    for name, figures in current.get("load", {}).items():
+        before = baseline.get("load", {}).get(name)
+        if not isinstance(figures, dict) or not isinstance(before, dict):
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if before.get(key) and figures[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{name} {key}: {before[key]} -> {figures[key]}")
+        if before.get("rps") and figures["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name} rps: {before['rps']} -> {figures['rps']}")
+    for name, figures in current.get("micro", {}).items():
+        before = baseline.get("micro", {}).get(name)
+        if before and figures["median_us"] > before["median_us"] * (1 + tolerance):
+            regressions.append(f"{name} median_us: {before['median_us']} -> {figures['median_us']}")
+    return regressions
+
+
+def print_report(report: Dict):
+    print(f"scenario={report['config']['scenario']} concurrency={report['config']['concurrency']} "
+          f"api_latency_ms={report['config']['api_latency_ms']} api_error_rate={report['config']['api_error_rate']}")
+    print(f"{'endpoint':<16}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses")
+    for name, figures in report.get("load", {}).items():
+        if not isinstance(figures, dict):
+            continue
+        print(f"{name:<16}{figures['rps']:>10}{figures['p50_ms']:>10}{figures['p95_ms']:>10}"
+              f"{figures['p99_ms']:>10}  {figures['statuses']} {figures.get('slip_cache', '')}")
+    if "upstream_requests" in report.get("load", {}):
+        print(f"stats API requests: {report['load']['upstream_requests']}")
+    if report.get("micro"):
+        print(f"\n{'microbenchmark':<28}{'median us':>12}{'min us':>10}{'ops/s':>12}")
+        for name, figures in report["micro"].items():
+            print(f"{name:<28}{figures['median_us']:>12}{figures['min_us']:>10}{figures['ops_per_sec']:>12}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Parlay Pulse API against local stand-ins.")
+    parser.add_argument("--scenario", choices=["api", "table"], default="api",
+                        help="api: score through the stats cache and fake API; table: from the warm game table")
+    parser.add_argument("--requests", type=int, default=500, help="/analyze requests to measure")
+    parser.add_argument("--image-requests", type=int, default=100, help="/analyze-image requests to measure")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--legs", type=int, default=3)
+    parser.add_argument("--images", type=int, default=20, help="distinct slips in the image corpus")
+    parser.add_argument("--api-latency-ms", type=float, default=50.0)
+    parser.add_argument("--api-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--api-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", default=["analyze", "analyze-image", "micro"],
+                        choices=["analyze", "analyze-image", "micro"])
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    configure_environment(args.scenario)
+    report = {"config": {
+        key: getattr(args, key)
+        for key in ("scenario", "requests", "concurrency", "legs", "api_latency_ms", "api_error_rate", "seed")
+    }}
+    if {"analyze", "analyze-image"} & set(args.only):
+        report["load"] = asyncio.run(run_load(args))
+    if "micro" in args.only:
+        from .micro import run_micro
+        report["micro"] = run_micro()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
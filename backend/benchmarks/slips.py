@@ -0,0 +1,92 @@
+"""Synthetic bet-slip screenshots for the /analyze-image benchmark.
+
+Slips follow the moneyline layout ImageProcessor._parse_bet_text reads: the
+parlay odds first, then per leg the picked team (marked with ©), the matchup
+and the leg odds. Write a corpus to disk with:
+
+    python -m benchmarks.slips --out /tmp/slips --count 20
+"""
+import argparse
+import io
+import random
+from typing import Dict, List, Tuple
+import os
+from PIL import Image, ImageDraw, ImageFont
+from .fake_stats_api import TEAMS
+
+SLIP_WIDTH = 1170  # iPhone screenshot width
+LINE_HEIGHT = 72
+FONT_SIZE = 44
+
+
+def _font(size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 only has the small bitmap font
+        return ImageFont.load_default()
+
+
+def random_parlay(rng: random.Random, legs: int) -> Dict:
+    """A parlay of distinct matchups between the fake API's teams, in /analyze request shape."""
+    names = [name for _, name, _, _, _ in TEAMS]
+    rng.shuffle(names)
+    bets = []
+    for away, home in zip(names[:legs * 2:2], names[1:legs * 2:2]):
+        picked_home = rng.random() < 0.5
+        bets.append({
+            "team": home if picked_home else away,
+            "opponent": away if picked_home else home,
+            "bet_type": "moneyline",
+            "odds": rng.choice([-250, -180, -150, -120, 110, 135, 160, 210]),
+            "details": {"away": away, "home": home},
+        })
+    return {"total_odds": rng.randint(250, 1500), "individual_bets": bets}
+
+
+def render_slip(parlay: Dict, dark: bool = False) -> bytes:
+    """Draw a parlay as a PNG slip screenshot."""
+    lines: List[str] = [f"{len(parlay['individual_bets'])} Leg Parlay", f"+{parlay['total_odds']}", ""]
+    for bet in parlay["individual_bets"]:
+        lines += [f"© {bet['team']}", f"{bet['details']['away']} @ {bet['details']['home']}"]
+        lines += [f"{bet['odds']:+d}", ""]
+    lines.append("Wager $10.00   To Pay $75.96")
+
+    background, foreground = ("#101418", "#f2f2f2") if dark else ("#ffffff", "#111111")
+    image = Image.new("RGB", (SLIP_WIDTH, LINE_HEIGHT * (len(lines) + 2)), background)
+    draw = ImageDraw.Draw(image)
+    font = _font(FONT_SIZE)
+    for i, line in enumerate(lines):
+        draw.text((60, LINE_HEIGHT * (i + 1)), line, fill=foreground, font=font)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def build_corpus(count: int, legs: int = 3, seed: int = 0) -> List[Tuple[bytes, Dict]]:
+    """count distinct (PNG bytes, expected parlay) pairs; every fourth slip uses a dark theme."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        parlay = random_parlay(rng, legs)
+        corpus.append((render_slip(parlay, dark=i % 4 == 3), parlay))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--legs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for i, (image, _) in enumerate(build_corpus(args.count, args.legs, args.seed)):
+        with open(os.path.join(args.out, f"slip_{i:03d}.png"), "wb") as f:
+            f.write(image)
+
+
+if __name__ == "__main__":
+    main()